@@ -5,6 +5,18 @@ import numpy as np
 
 from lfv_pdnn.common import common_utils
 
+try:
+    import numba
+except ImportError:  # numba is optional, fall back to plain numpy
+    numba = None
+try:
+    import numexpr
+except ImportError:  # numexpr is optional, fall back to plain numpy
+    numexpr = None
+
+# ufuncs used to make cuts, keyed by cut_type
+_CUT_OPS = {"=": np.equal, ">": np.greater, "<": np.less}
+
 
 def clean_negative_weights(array, weight_id, verbose=False):
     """removes elements with negative weight.
@@ -21,14 +33,18 @@ def clean_negative_weights(array, weight_id, verbose=False):
     if verbose:
         print("cleaning array elements with negative weights...")
     # Clean
-    # create new array for output to avoid direct operation on input array
-    new = []
-    for d in array:
-        if d[weight_id] < 0.0:  # remove zero or negative weight row
-            continue
-        new.append(d)
+    # index list take returns a new array, input array is untouched
+    weights = array[:, weight_id]
+    if numba is not None:
+        keep_mask, num_removed = _weight_keep_kernel(weights, True)
+        if num_removed == 0:
+            out = array.copy()  # nothing to remove, plain copy is cheaper
+        else:
+            out = array[np.flatnonzero(keep_mask)]
+    else:
+        # rows with NaN weight are kept
+        out = array[np.flatnonzero(~(weights < 0.0))]
     # Output
-    out = np.array(new)
     if verbose:
         print("shape before", array.shape, "shape after", out.shape)
     return out
@@ -49,14 +65,17 @@ def clean_zero_weights(array, weight_id, verbose=False):
     if verbose:
         print("cleaning array elements with zero weights ...")
     # Clean
-    # create new array for output to avoid direct operation on input array
-    new = []
-    for d in array:
-        if d[weight_id] == 0.0:  # only remove zero weight row
-            continue
-        new.append(d)
+    # index list take returns a new array, input array is untouched
+    weights = array[:, weight_id]
+    if numba is not None:
+        keep_mask, num_removed = _weight_keep_kernel(weights, False)
+        if num_removed == 0:
+            out = array.copy()  # nothing to remove, plain copy is cheaper
+        else:
+            out = array[np.flatnonzero(keep_mask)]
+    else:
+        out = array[np.flatnonzero(weights != 0.0)]  # only remove zero weight row
     # Output
-    out = np.array(new)
     if verbose:
         print("shape before", array.shape, "shape after", out.shape)
     return out
@@ -67,14 +86,16 @@ def get_cut_index(array, cut_values, cut_types):
     assert len(cut_values) == len(
         cut_types
     ), "cut_values and cut_types should have same length."
-    pass_index = None
+    pass_mask = None
     for cut_value, cut_type in zip(cut_values, cut_types):
-        temp_index = get_cut_index_value(array, cut_value, cut_type)
-        if pass_index is None:
-            pass_index = temp_index
+        temp_mask = get_cut_mask_value(array, cut_value, cut_type)
+        if pass_mask is None:
+            pass_mask = temp_mask
         else:
-            pass_index = np.intersect1d(pass_index, temp_index)
-    return pass_index
+            pass_mask &= temp_mask
+    if pass_mask is None:
+        return None
+    return np.flatnonzero(pass_mask)
 
 
 def get_cut_index_value(array, cut_value, cut_type):
@@ -92,16 +113,56 @@ def get_cut_index_value(array, cut_value, cut_type):
         cut_feature: str
         cut_bool: bool
     """
-    # Make cuts
-    if cut_type == "=":
-        pass_index = np.argwhere(array == cut_value)
-    elif cut_type == ">":
-        pass_index = np.argwhere(array > cut_value)
-    elif cut_type == "<":
-        pass_index = np.argwhere(array < cut_value)
-    else:
+    return np.flatnonzero(get_cut_mask_value(array, cut_value, cut_type))
+
+
+def get_cut_mask_value(array, cut_value, cut_type):
+    """Returns boolean mask of elements passing cut_value and cut_type.
+
+    Same cut conventions as get_cut_index_value. Masks of several cuts can be
+    combined with "&" before converting to indexes only once.
+
+    """
+    try:
+        cut_op = _CUT_OPS[cut_type]
+    except KeyError:
         raise ValueError("Invalid cut_type specified.")
-    return pass_index.flatten()
+    # Make cuts
+    return cut_op(array, cut_value)
+
+
+def get_unselected_mask(
+    array,
+    select_channel=False,
+    select_mass=False,
+    mass_id=None,
+    mass_min=None,
+    mass_max=None,
+):
+    """Returns boolean mask of rows failing channel and/or mass selection.
+
+    Channel is checked with index -2. The compound expression is evaluated in
+    one fused loop with numexpr if available.
+
+    """
+    channels = array[:, -2]
+    if select_mass:
+        masses = array[:, mass_id]
+    if numexpr is not None:
+        expressions = []
+        if select_channel:
+            expressions.append("(channels != 1.0)")
+        if select_mass:
+            expressions.append("(masses < mass_min) | (masses > mass_max)")
+        if len(expressions) == 0:
+            return np.zeros(len(array), dtype=bool)
+        return numexpr.evaluate(" | ".join(expressions))
+    unselected_mask = np.zeros(len(array), dtype=bool)
+    if select_channel:
+        unselected_mask |= channels != 1.0
+    if select_mass:
+        unselected_mask |= (masses < mass_min) | (masses > mass_max)
+    return unselected_mask
 
 
 def modify_array(
@@ -163,36 +224,78 @@ def modify_array(
 
   """
     # Modify
-    new = input_array.copy()  # copy data to avoid original data operation
+    # no upfront copy, cleaning below always creates a new array
+    new = input_array
     if len(new) == 0:
         warnings.warn("empty input detected in modify_array, no changes will be made.")
-        return new
-    # select channel
-    if select_channel == True:
-        for ele in new:
-            if ele[-2] != 1.0:
-                ele[-1] = 0
-    # select mass range
+        return new.copy()
+    # check mass selection parameters
     if select_mass == True:
-        if not common_utils.has_none([mass_id, mass_min, mass_max]):
-            for ele in new:
-                if ele[mass_id] < mass_min or ele[mass_id] > mass_max:
-                    ele[-1] = 0
-        else:
+        if common_utils.has_none([mass_id, mass_min, mass_max]):
             print("missing parameters, skipping mass selection...")
-    # clean array
-    new = clean_zero_weights(new, -1)
-    if remove_negative_weight:
-        new = clean_negative_weights(new, -1)
+            select_mass = False
+    if numba is not None and new.dtype in (np.float32, np.float64):
+        # select channel/mass, clean array and normalize weight in a single pass
+        new, total_weight = _modify_kernel(
+            new,
+            select_channel == True,
+            select_mass == True,
+            mass_id if select_mass == True else 0,
+            float(mass_min) if select_mass == True else 0.0,
+            float(mass_max) if select_mass == True else 0.0,
+            bool(remove_negative_weight),
+            norm == True,
+            float(sumofweight) if norm == True else 0.0,
+        )
+        if norm == True and total_weight == 0.0:
+            warnings.warn(
+                "total weight is 0 in modify_array, weights are not normalized."
+            )
+        norm = False  # already normalized, reset mass doesn't change weights
+    else:
+        # combine all filters into one keep mask and take rows only once,
+        # no weights are zeroed so input array doesn't need to be copied
+        weights = new[:, -1]
+        keep_mask = weights != 0.0
+        if remove_negative_weight:
+            # rows with NaN weight are kept, same as the kernel
+            keep_mask &= ~(weights < 0.0)
+        # select channel/mass range
+        if select_channel == True or select_mass == True:
+            unselected_mask = get_unselected_mask(
+                new,
+                select_channel=select_channel == True,
+                select_mass=select_mass == True,
+                mass_id=mass_id,
+                mass_min=mass_min,
+                mass_max=mass_max,
+            )
+            keep_mask[unselected_mask] = False
+        # clean array
+        new = new[np.flatnonzero(keep_mask)]
     # reset mass
     if reset_mass == True:
         if not common_utils.has_none([reset_mass_array, reset_mass_id]):
-            new = prep_mass_fast(new, reset_mass_array, mass_id=reset_mass_id)
+            # new is already a fresh array after cleaning
+            new = prep_mass_fast(
+                new, reset_mass_array, mass_id=reset_mass_id, inplace=True
+            )
         else:
             print("missing parameters, skipping mass reset...")
     # normalize weight
     if norm == True:
-        new[:, -1] = norweight(new[:, -1], norm=sumofweight)
+        # scale in place, new doesn't share memory with input_array here
+        if not np.issubdtype(new.dtype, np.floating):
+            # integer weights can't be scaled in place
+            new = new.astype(np.float64)
+        weights = new[:, -1]
+        total_weight = weights.sum()
+        if total_weight == 0.0:
+            warnings.warn(
+                "total weight is 0 in modify_array, weights are not normalized."
+            )
+        else:
+            weights *= sumofweight / total_weight
     # shuffle array
     if shuffle == True:
         new, _, _, _ = shuffle_and_split(
@@ -202,6 +305,103 @@ def modify_array(
     return new
 
 
+if numba is not None:
+    # compile eagerly for the float types used by arrays, avoids the first call
+    # jit stall and gives a tight loop for each dtype
+    _MODIFY_KERNEL_SIGNATURES = [
+        numba.types.Tuple((dtype[:, :], numba.float64))(
+            dtype[:, :],
+            numba.boolean,
+            numba.boolean,
+            numba.intp,
+            numba.float64,
+            numba.float64,
+            numba.boolean,
+            numba.boolean,
+            numba.float64,
+        )
+        for dtype in (numba.float32, numba.float64)
+    ]
+
+    @numba.njit(_MODIFY_KERNEL_SIGNATURES, cache=True)
+    def _modify_kernel(
+        array,
+        select_channel,
+        select_mass,
+        mass_id,
+        mass_min,
+        mass_max,
+        remove_negative,
+        norm,
+        sumofweight,
+    ):
+        """Selects channel/mass range and removes zero (negative) weight rows.
+
+        Rows failing the selection would get weight 0 and be cleaned anyway, so
+        the keep decision and the compaction are done in one kernel instead of
+        several full passes over the array. If norm is True, total weight of
+        kept rows is accumulated on the way and applied while compacting, rows
+        are not scaled if the total weight is 0.
+
+        Returns:
+            Tuple of (compacted array, total weight of kept rows)
+
+        """
+        num_rows, num_cols = array.shape
+        weight_id = num_cols - 1
+        keep = np.empty(num_rows, dtype=np.bool_)
+        num_kept = 0
+        total_weight = 0.0
+        for i in range(num_rows):
+            weight = array[i, weight_id]
+            passed = weight != 0.0
+            if remove_negative and weight < 0.0:
+                passed = False
+            if select_channel and array[i, num_cols - 2] != 1.0:
+                passed = False
+            if select_mass and (
+                array[i, mass_id] < mass_min or array[i, mass_id] > mass_max
+            ):
+                passed = False
+            keep[i] = passed
+            if passed:
+                num_kept += 1
+                total_weight += weight
+        scale = 1.0
+        if norm and total_weight != 0.0:
+            scale = sumofweight / total_weight
+        # write compacted rows to preallocated output
+        out = np.empty((num_kept, num_cols), dtype=array.dtype)
+        write_id = 0
+        for i in range(num_rows):
+            if keep[i]:
+                for j in range(weight_id):
+                    out[write_id, j] = array[i, j]
+                out[write_id, weight_id] = array[i, weight_id] * scale
+                write_id += 1
+        return out, total_weight
+
+    @numba.njit(parallel=True, cache=True)
+    def _weight_keep_kernel(weights, remove_negative):
+        """Returns keep mask for weight cleaning and number of removed rows.
+
+        Removes zero weight rows, or negative weight rows if remove_negative is
+        True. Loop is split into chunks over threads by prange.
+
+        """
+        num_rows = weights.shape[0]
+        keep = np.empty(num_rows, dtype=np.bool_)
+        num_removed = 0
+        for i in numba.prange(num_rows):
+            if remove_negative:
+                keep[i] = not weights[i] < 0.0
+            else:
+                keep[i] = weights[i] != 0.0
+            if not keep[i]:
+                num_removed += 1
+        return keep, num_removed
+
+
 def norweight(weight_array, norm=1000):
     """Normalize given weight array to certain value
 
@@ -221,14 +421,11 @@ def norweight(weight_array, norm=1000):
         arr[:, -1] = norweight(arr[:, -1], norm=1)
 
     """
-    new = weight_array.copy()  # copy data to avoid original data operation
-    total_weight = sum(new)
-    frac = norm / total_weight
-    new = frac * new
-    return new
+    # single allocation, input is not modified
+    return weight_array * (norm / weight_array.sum())
 
 
-def prep_mass_fast(xbtrain, xstrain, mass_id=0, shuffle_seed=None):
+def prep_mass_fast(xbtrain, xstrain, mass_id=0, shuffle_seed=None, inplace=False):
     """Resets background mass distribution according to signal distribution
 
     Args:
@@ -242,29 +439,38 @@ def prep_mass_fast(xbtrain, xstrain, mass_id=0, shuffle_seed=None):
             Seed for randomization process.
             Set to None to use current time as seed.
             Set to a specific value to get an unchanged shuffle result.
+        inplace: bool, optional (default=False)
+            Whether to write the mass column of xbtrain directly instead of
+            resetting a copy.
 
     Returns:
         new: numpy array
             new background array with mass distribution reset
 
     """
-    new = reset_col(xbtrain, xstrain, col=mass_id, shuffle_seed=None)
+    new = reset_col(xbtrain, xstrain, col=mass_id, shuffle_seed=None, inplace=inplace)
     return new
 
 
-def reset_col(reset_array, ref_array, col=0, shuffle_seed=None):
-    """Resets one column in an array based on the distribution of refference."""
+def reset_col(reset_array, ref_array, col=0, shuffle_seed=None, inplace=False):
+    """Resets one column in an array based on the distribution of refference.
+
+    If inplace is True, column of reset_array is overwritten without copy.
+
+    """
     if common_utils.has_none([shuffle_seed]):
         shuffle_seed = int(time.time())
-    np.random.seed(shuffle_seed)
-    new = reset_array.copy()
+    rng = np.random.default_rng(shuffle_seed)
+    if inplace:
+        new = reset_array
+    else:
+        new = reset_array.copy()
     total_events = len(new)
-    sump = sum(ref_array[:, -1])
-    reset_list = np.random.choice(
-        ref_array[:, col], size=total_events, p=1 / sump * ref_array[:, -1]
+    sump = np.sum(ref_array[:, -1])
+    reset_list = rng.choice(
+        ref_array[:, col], size=total_events, p=ref_array[:, -1] / sump
     )
-    for count, entry in enumerate(new):
-        entry[col] = reset_list[count]
+    new[:, col] = reset_list
     return new
 
 
@@ -276,15 +482,14 @@ def shuffle_and_split(x, y, split_ratio=0.0, shuffle_seed=None):
     if len(x) != len(y):
         raise ValueError("Length of x and y is not same.")
     array_len = len(y)
-    np.random.seed(shuffle_seed)
-    # get index for the first part of the splited array
-    first_part_index = np.random.choice(
-        range(array_len), int(array_len * 1.0 * split_ratio), replace=False
-    )
-    # get index for last part of the splitted array
-    last_part_index = np.setdiff1d(np.array(range(array_len)), first_part_index)
-    first_part_x = x[first_part_index]
-    first_part_y = y[first_part_index]
-    last_part_x = x[last_part_index]
-    last_part_y = y[last_part_index]
+    rng = np.random.default_rng(shuffle_seed)
+    # shuffle x/y with one gather each, both parts are views of shuffled arrays
+    shuffle_index = rng.permutation(array_len)
+    first_part_len = int(array_len * 1.0 * split_ratio)
+    x_shuffled = x[shuffle_index]
+    y_shuffled = y[shuffle_index]
+    first_part_x = x_shuffled[:first_part_len]
+    first_part_y = y_shuffled[:first_part_len]
+    last_part_x = x_shuffled[first_part_len:]
+    last_part_y = y_shuffled[first_part_len:]
     return first_part_x, last_part_x, first_part_y, last_part_y
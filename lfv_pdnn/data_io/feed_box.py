@@ -33,9 +33,10 @@ class Feedbox(object):
         verbose=1,
     ):
         # basic array collection
-        self.xs_dict = copy.deepcopy(xs_dict)
-        self.xb_dict = copy.deepcopy(xb_dict)
-        self.xd_dict = copy.deepcopy(xd_dict)
+        # only dicts are copied, cut_array below always returns new arrays
+        self.xs_dict = copy.copy(xs_dict)
+        self.xb_dict = copy.copy(xb_dict)
+        self.xd_dict = copy.copy(xd_dict)
         # meta info
         self.apply_data = apply_data
         self.selected_features = selected_features
@@ -310,19 +311,19 @@ def cut_array(
         assert len(cut_features) == len(cut_values) and len(cut_features) == len(
             cut_types
         ), "cut_features and cut_values and cut_types should have same length."
-        pass_index_array = None
+        pass_mask = None
         for (cut_feature, cut_value, cut_type) in zip(
             cut_features, cut_values, cut_types
         ):
             cut_feature_id = selected_features.index(cut_feature)
-            # update cut index
-            temp_index = array_utils.get_cut_index_value(
+            # update cut mask
+            temp_mask = array_utils.get_cut_mask_value(
                 input_array[:, cut_feature_id], cut_value, cut_type
             )
-            if pass_index_array is None:
-                pass_index_array = temp_index
+            if pass_mask is None:
+                pass_mask = temp_mask
             else:
-                pass_index_array = np.intersect1d(pass_index_array, temp_index)
-        return input_array[pass_index_array.flatten(), :]
+                pass_mask &= temp_mask
+        return input_array[np.flatnonzero(pass_mask), :]
     else:
         return input_array.copy()
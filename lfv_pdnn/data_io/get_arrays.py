@@ -208,18 +208,18 @@ def get_npy_individuals(
             assert len(cut_features) == len(cut_values) and len(cut_features) == len(
                 cut_types
             ), "cut_features and cut_values and cut_types should have same length."
-            pass_index = None
+            pass_mask = None
             for cut_feature_id, (cut_value, cut_type) in enumerate(
                 zip(cut_values, cut_types)
             ):
-                temp_index = array_utils.get_cut_index_value(
+                temp_mask = array_utils.get_cut_mask_value(
                     cut_array[:, cut_feature_id], cut_value, cut_type
                 )
-                if pass_index is None:
-                    pass_index = temp_index
+                if pass_mask is None:
+                    pass_mask = temp_mask
                 else:
-                    pass_index = np.intersect1d(pass_index, temp_index)
-            npy_array = npy_array[pass_index.flatten(), :]
+                    pass_mask &= temp_mask
+            npy_array = npy_array[np.flatnonzero(pass_mask), :]
 
             total_weights = np.sum(npy_array[:, -1])
             print(
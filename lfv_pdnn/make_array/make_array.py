@@ -15,11 +15,14 @@ def dump_flat_ntuple_individual(
     save_dir: str,
     save_pre_fix: str,
     use_lower_var_name: bool = False,
+    dtype=None,
 ) -> None:
     """Reads numpy array from ROOT ntuple and convert to numpy array.
    
   Note:
     Each branch will be saved as an individual file.
+    If dtype is given, e.g. np.float32, branches are converted before saving
+    to reduce file size and memory of arrays loaded later.
 
   """
     try:
@@ -34,6 +37,8 @@ def dump_flat_ntuple_individual(
             file_name = save_pre_fix + "_" + var
         print("Generating:", file_name)
         temp_arr = events.array(var)
+        if dtype is not None:
+            temp_arr = np.asarray(temp_arr, dtype=dtype)
         save_array(temp_arr, save_dir, file_name)
 
 
@@ -7,10 +7,13 @@ import json
 import math
 import warnings
 
+import joblib
 import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
 import seaborn as sns
 from matplotlib.ticker import NullFormatter
+from scipy.special import expit
 from sklearn.metrics import auc, roc_auc_score, roc_curve
 
 import ROOT
@@ -19,23 +22,259 @@ from lfv_pdnn.common import array_utils, common_utils
 from lfv_pdnn.data_io import feed_box, get_arrays
 from lfv_pdnn.train import train_utils
 
+try:
+    import numba
+except ImportError:  # numba is optional, fall back to plain numpy
+    numba = None
+
+# canvases reused by 2d plots, keyed by (name, width, height)
+_canvas_cache = {}
+
 
 def calculate_auc(xs, xb, model, shuffle_col=None, rm_last_two=False):
     """Returns auc of given sig/bkg array."""
-    x_plot, y_plot, y_pred = process_array(
+    w_plot, y_plot, y_pred = process_array(
         xs, xb, model, shuffle_col=shuffle_col, rm_last_two=rm_last_two
     )
-    fpr_dm, tpr_dm, _ = roc_curve(y_plot, y_pred, sample_weight=x_plot[:, -1])
+    fpr_dm, tpr_dm, _ = roc_curve(y_plot, y_pred, sample_weight=w_plot)
     # Calculate auc and return
     auc_value = auc(fpr_dm, tpr_dm)
     return auc_value
 
 
+def _canvas(name, width, height):
+    """Gets cached ROOT canvas with given name and size, cleared for reuse."""
+    cache_key = (name, width, height)
+    canvas = _canvas_cache.get(cache_key)
+    if canvas is None:
+        canvas = ROOT.TCanvas(name, name, width, height)
+        _canvas_cache[cache_key] = canvas
+    else:
+        canvas.Clear()
+        canvas.cd()
+    return canvas
+
+
+def _predict(model, x):
+    """Predicts with large batches and without progress bar output."""
+    return model.predict(x, batch_size=8192, verbose=0)
+
+
+def _get_float32_features(array, out=None):
+    """Gets valid features of array as float32 model input.
+
+    Args:
+        array: numpy array with weight and channel columns at the end
+        out: float32 buffer with len(array) rows to write to, a new array is
+            allocated if None
+
+    """
+    features = train_utils.get_valid_feature(array)
+    if out is None:
+        return features.astype(np.float32)
+    out[...] = features
+    return out
+
+
+def _get_cached_predictions(model_wrapper, which, key):
+    """Gets feedbox raw array with its model predictions.
+
+    Results are memoized on model_wrapper, so plots based on the same sample
+    share one model prediction. The memo is cleared by the model wrapper when
+    inputs or model are changed.
+
+    Args:
+        model_wrapper: model wrapper with feedbox and model_meta set
+        which: input type of feedbox, "xs", "xb" or "xd"
+        key: array key of the sample
+
+    Returns:
+        Tuple of (raw_array, predictions, weights)
+
+    """
+    pred_cache = model_wrapper._pred_cache
+    if (which, key) not in pred_cache:
+        raw_array = model_wrapper.feedbox.get_array(which, "raw", array_key=key)
+        # inputs are normalized in the model, raw array is left untouched
+        predictions = _predict(
+            model_wrapper.get_norm_model(), _get_float32_features(raw_array)
+        )
+        weights = raw_array[:, -1]
+        pred_cache[(which, key)] = (raw_array, predictions, weights)
+    return pred_cache[(which, key)]
+
+
+def _get_uniform_bin_ids(values, low, up, nbin):
+    """Gets ROOT bin numbers of values for uniform binning.
+
+    Bin index is computed directly instead of binary search over bin edges,
+    with the same formula as TAxis::FindFixBin. Bin 0 is underflow and bin
+    nbin + 1 is overflow.
+
+    """
+    values = np.ravel(values).astype(np.float64)
+    with np.errstate(invalid="ignore"):
+        bin_ids = np.floor(nbin * (values - low) / (up - low)).astype(np.int64) + 1
+    # values just below up may be rounded to nbin + 1, keep them in last bin
+    bin_ids = np.clip(bin_ids, 1, nbin)
+    bin_ids[values < low] = 0
+    bin_ids[~(values < up)] = nbin + 1
+    return bin_ids
+
+
+def _fill_uniform_hist(values, weights, low, up, nbin):
+    """Gets sum of weights and sum of weight squares of uniform bins.
+
+    Returns:
+        Tuple of (sumw, sumw2), each with nbin + 2 entries including
+        underflow/overflow as ROOT convention
+
+    """
+    values = np.ascontiguousarray(np.ravel(values), dtype=np.float64)
+    weights = np.ascontiguousarray(np.ravel(weights), dtype=np.float64)
+    if numba is not None:
+        return _fill_w(
+            values, weights, float(low), float(up), int(nbin), numba.get_num_threads()
+        )
+    bin_ids = _get_uniform_bin_ids(values, low, up, nbin)
+    sumw = np.bincount(bin_ids, weights=weights, minlength=nbin + 2)
+    sumw2 = np.bincount(bin_ids, weights=weights * weights, minlength=nbin + 2)
+    return sumw, sumw2
+
+
+def _uniform_hist_w_w2(x, w, xlo, xhi, nbin):
+    """Gets sum of weights and weight squares of uniform bins in [xlo, xhi].
+
+    Same as np.histogram with range=(xlo, xhi) and weights w (or w * w), but
+    bin indices are computed directly and only once for both sums.
+
+    Returns:
+        Tuple of (counts, sumw2), each with nbin entries, entries out of range
+        are not counted
+
+    """
+    x = np.ravel(x)
+    w = np.ravel(w)
+    bin_type = np.result_type(xlo, xhi, x)
+    if np.issubdtype(bin_type, np.integer):
+        bin_type = np.result_type(bin_type, float)
+    edges = np.linspace(xlo, xhi, nbin + 1, endpoint=True, dtype=bin_type)
+    in_range = (x >= xlo) & (x <= xhi)
+    x = x[in_range].astype(bin_type, copy=False)
+    w = w[in_range]
+    idx = ((x - edges[0]) / (edges[-1] - edges[0]) * nbin).astype(np.intp)
+    # x == xhi belongs to last bin
+    idx[idx == nbin] -= 1
+    # same edge correction as np.histogram for values within ~1 ulp of edges
+    idx[x < edges[idx]] -= 1
+    idx[(x >= edges[idx + 1]) & (idx != nbin - 1)] += 1
+    counts = np.bincount(idx, weights=w, minlength=nbin)
+    sumw2 = np.bincount(idx, weights=w * w, minlength=nbin)
+    return counts, sumw2
+
+
+if numba is not None:
+
+    # eager signature, kernel is compiled at import instead of first fill
+    @numba.njit(
+        "Tuple((float64[:], float64[:]))"
+        "(float64[:], float64[:], float64, float64, int64, int64)",
+        parallel=True,
+        cache=True,
+    )
+    def _fill_w(x, w, xlow, xup, nbin, num_chunks):
+        """Fills sumw and sumw2 in one pass, entries are split over threads."""
+        chunk_size = (x.shape[0] + num_chunks - 1) // num_chunks
+        # per-thread accumulators avoid race on shared bins
+        sumw_chunks = np.zeros((num_chunks, nbin + 2))
+        sumw2_chunks = np.zeros((num_chunks, nbin + 2))
+        for chunk_id in numba.prange(num_chunks):
+            start = chunk_id * chunk_size
+            stop = min(start + chunk_size, x.shape[0])
+            for i in range(start, stop):
+                if x[i] < xlow:
+                    idx = 0
+                elif not x[i] < xup:
+                    idx = nbin + 1
+                else:
+                    idx = int(nbin * (x[i] - xlow) / (xup - xlow)) + 1
+                    # values just below xup may be rounded to overflow
+                    if idx == nbin + 1:
+                        idx = nbin
+                sumw_chunks[chunk_id, idx] += w[i]
+                sumw2_chunks[chunk_id, idx] += w[i] * w[i]
+        return sumw_chunks.sum(axis=0), sumw2_chunks.sum(axis=0)
+
+
+def fill_th1_with_numpy(th1_tool, fill_array, weight_array):
+    """Fills histogram of TH1FTool with one numpy pass instead of entry loop.
+
+    Binning is read from the ROOT histogram, so it can be called after
+    reinitial_hist_with_fill_array. Underflow/overflow follow ROOT convention.
+
+    Args:
+        th1_tool: th1_tools.TH1FTool to be filled
+        fill_array: numpy array of values to fill
+        weight_array: numpy array of weights with same length as fill_array
+
+    """
+    hist = th1_tool.get_hist()
+    x_axis = hist.GetXaxis()
+    nbin = hist.GetNbinsX()
+    weights = np.ravel(weight_array).astype(np.float64)
+    if x_axis.GetXbins().GetSize() == 0:
+        # fixed bin size, bin index is computed directly
+        sumw, sumw2 = _fill_uniform_hist(
+            fill_array, weights, x_axis.GetXmin(), x_axis.GetXmax(), nbin
+        )
+    else:
+        edges = np.array([x_axis.GetBinLowEdge(i) for i in range(1, nbin + 2)])
+        # bin 0 is underflow and bin nbin + 1 is overflow, same as ROOT bin number
+        bin_ids = np.searchsorted(edges, np.ravel(fill_array), side="right")
+        sumw = np.bincount(bin_ids, weights=weights, minlength=nbin + 2)
+        sumw2 = np.bincount(bin_ids, weights=weights * weights, minlength=nbin + 2)
+    hist.SetContent(np.ascontiguousarray(sumw))
+    hist.SetError(np.ascontiguousarray(np.sqrt(sumw2)))
+    hist.SetEntries(len(weights))
+
+
+def fill_th2_with_numpy(th2_tool, fill_array_x, fill_array_y, weight_array):
+    """Fills histogram of TH2FTool with one numpy pass instead of entry loop.
+
+    Args:
+        th2_tool: th1_tools.TH2FTool with uniform binning to be filled
+        fill_array_x: numpy array of x values to fill
+        fill_array_y: numpy array of y values to fill
+        weight_array: numpy array of weights with same length as fill arrays
+
+    """
+    hist = th2_tool.get_hist()
+    x_axis = hist.GetXaxis()
+    y_axis = hist.GetYaxis()
+    nbinx = hist.GetNbinsX()
+    nbiny = hist.GetNbinsY()
+    weights = np.ravel(weight_array).astype(np.float64)
+    bin_ids_x = _get_uniform_bin_ids(
+        fill_array_x, x_axis.GetXmin(), x_axis.GetXmax(), nbinx
+    )
+    bin_ids_y = _get_uniform_bin_ids(
+        fill_array_y, y_axis.GetXmin(), y_axis.GetXmax(), nbiny
+    )
+    # global bin number including underflow/overflow, same as TH2::GetBin
+    bin_ids = bin_ids_x + (nbinx + 2) * bin_ids_y
+    num_cells = (nbinx + 2) * (nbiny + 2)
+    sumw = np.bincount(bin_ids, weights=weights, minlength=num_cells)
+    sumw2 = np.bincount(bin_ids, weights=weights * weights, minlength=num_cells)
+    hist.SetContent(np.ascontiguousarray(sumw))
+    hist.SetError(np.ascontiguousarray(np.sqrt(sumw2)))
+    hist.SetEntries(len(weights))
+
+
 def get_significances(model_wrapper, significance_algo="asimov"):
     """Gets significances scan arrays.
     
     Return:
-        Tuple of 4 arrays: (
+        Tuple of 4 numpy arrays: (
             threshold array,
             significances,
             sig_total_weight_above_threshold,
@@ -43,68 +282,127 @@ def get_significances(model_wrapper, significance_algo="asimov"):
             )
     
     """
-    feedbox = model_wrapper.feedbox
     model_meta = model_wrapper.model_meta
     # prepare signal
     sig_key = model_meta["sig_key"]
-    sig_arr_temp = feedbox.get_array("xs", "raw", array_key=sig_key)
-    sig_arr_temp[:, 0:-2] = train_utils.norarray(
-        sig_arr_temp[:, 0:-2],
-        average=np.array(model_meta["norm_average"]),
-        variance=np.array(model_meta["norm_variance"]),
-    )
-    sig_selected_arr = train_utils.get_valid_feature(sig_arr_temp)
-    sig_predictions = model_wrapper.get_model().predict(sig_selected_arr)
-    sig_predictions_weights = np.reshape(
-        feedbox.get_array("xs", "reshape", array_key=sig_key)[:, -1], (-1, 1)
+    _, sig_predictions, sig_predictions_weights = _get_cached_predictions(
+        model_wrapper, "xs", sig_key
     )
     # prepare background
     bkg_key = model_meta["bkg_key"]
-    bkg_arr_temp = feedbox.get_array("xb", "raw", array_key=bkg_key)
-    bkg_arr_temp[:, 0:-2] = train_utils.norarray(
-        bkg_arr_temp[:, 0:-2],
-        average=np.array(model_meta["norm_average"]),
-        variance=np.array(model_meta["norm_variance"]),
+    _, bkg_predictions, bkg_predictions_weights = _get_cached_predictions(
+        model_wrapper, "xb", bkg_key
     )
-    bkg_selected_arr = train_utils.get_valid_feature(bkg_arr_temp)
-    bkg_predictions = model_wrapper.get_model().predict(bkg_selected_arr)
-    bkg_predictions_weights = np.reshape(
-        feedbox.get_array("xb", "reshape", array_key=bkg_key)[:, -1], (-1, 1)
+    return get_significances_with_predictions(
+        sig_predictions,
+        sig_predictions_weights,
+        bkg_predictions,
+        bkg_predictions_weights,
+        significance_algo=significance_algo,
     )
+
+
+def get_significances_with_predictions(
+    sig_predictions,
+    sig_predictions_weights,
+    bkg_predictions,
+    bkg_predictions_weights,
+    significance_algo="asimov",
+):
+    """Gets significances scan arrays with given predictions and weights.
+
+    Return:
+        Same as get_significances
+
+    """
     # prepare thresholds
-    bin_array = np.array(range(-1000, 1000))
-    thresholds = 1.0 / (1.0 + 1.0 / np.exp(bin_array * 0.02))
-    thresholds = np.insert(thresholds, 0, 0)
+    bin_array = np.arange(-1000, 1000, dtype=np.float64)
+    thresholds = np.concatenate(([0.0], expit(bin_array * 0.02)))
     # scan
-    significances = []
-    plot_thresholds = []
-    sig_above_threshold = []
-    bkg_above_threshold = []
-    total_sig_weight = np.sum(sig_predictions_weights)
-    total_bkg_weight = np.sum(bkg_predictions_weights)
-    for dnn_cut in thresholds:
-        sig_ids_passed = sig_predictions > dnn_cut
-        total_sig_weights_passed = np.sum(sig_predictions_weights[sig_ids_passed])
-        bkg_ids_passed = bkg_predictions > dnn_cut
-        total_bkg_weights_passed = np.sum(bkg_predictions_weights[bkg_ids_passed])
-        if total_bkg_weights_passed > 0 and total_sig_weights_passed > 0:
-            plot_thresholds.append(dnn_cut)
-            current_significance = train_utils.calculate_significance(
-                total_sig_weights_passed,
-                total_bkg_weights_passed,
-                sig_total=total_sig_weight,
-                bkg_total=total_bkg_weight,
-                algo=significance_algo,
-            )
-            # current_significance = total_sig_weights_passed / total_bkg_weights_passed
-            significances.append(current_significance)
-            sig_above_threshold.append(total_sig_weights_passed)
-            bkg_above_threshold.append(total_bkg_weights_passed)
     total_sig_weight = np.sum(sig_predictions_weights)
     total_bkg_weight = np.sum(bkg_predictions_weights)
+    sig_above_threshold = get_weights_above_thresholds(
+        sig_predictions, sig_predictions_weights, thresholds
+    )
+    bkg_above_threshold = get_weights_above_thresholds(
+        bkg_predictions, bkg_predictions_weights, thresholds
+    )
+    passed = (sig_above_threshold > 0) & (bkg_above_threshold > 0)
+    plot_thresholds = thresholds[passed]
+    sig_above_threshold = sig_above_threshold[passed]
+    bkg_above_threshold = bkg_above_threshold[passed]
+    significances = train_utils.calculate_significance_array(
+        sig_above_threshold,
+        bkg_above_threshold,
+        sig_total=total_sig_weight,
+        bkg_total=total_bkg_weight,
+        algo=significance_algo,
+    )
     return (plot_thresholds, significances, sig_above_threshold, bkg_above_threshold)
 
 
+def get_weights_above_thresholds(predictions, weights, thresholds):
+    """Gets total weights of entries with prediction above each threshold.
+
+    Predictions are sorted only once, weights above each threshold are looked up
+    from the reversed cumulative sum with binary search.
+
+    Args:
+        predictions: numpy array of model predictions
+        weights: numpy array of weights with same length as predictions
+        thresholds: sorted numpy array of thresholds to scan
+
+    Returns:
+        numpy array of total weights with prediction > threshold
+
+    """
+    predictions = np.ravel(predictions)
+    order = np.argsort(predictions, kind="stable")
+    sorted_predictions = predictions[order]
+    sorted_weights = np.ravel(weights)[order]
+    # cum_w_above[i] is the total weight of entries from index i to the end
+    cum_w_above = np.zeros(len(sorted_weights) + 1)
+    cum_w_above[:-1] = np.cumsum(sorted_weights[::-1])[::-1]
+    ids = np.searchsorted(sorted_predictions, thresholds, side="right")
+    return cum_w_above[ids]
+
+
+def get_nearest_ids(values, targets):
+    """Gets index of the element in values nearest to each target.
+
+    Equivalent to (np.abs(values - target)).argmin() for each target, but
+    values are sorted only once and looked up with binary search.
+
+    Args:
+        values: numpy array to search in
+        targets: numpy array of target values
+
+    Returns:
+        numpy array of indices into values
+
+    """
+    values = np.ravel(values)
+    targets = np.ravel(targets)
+    order = np.argsort(values, kind="stable")
+    sorted_values = values[order]
+    num_values = len(sorted_values)
+    right = np.searchsorted(sorted_values, targets, side="left")
+    right = np.clip(right, 0, num_values - 1)
+    left = np.clip(right - 1, 0, num_values - 1)
+    # move left neighbor to the first element among duplicates, which has the
+    # smallest original index with stable sort
+    left = np.searchsorted(sorted_values, sorted_values[left], side="left")
+    right_ids = order[right]
+    left_ids = order[left]
+    right_dist = np.abs(sorted_values[right] - targets)
+    left_dist = np.abs(sorted_values[left] - targets)
+    # argmin returns the first occurrence when distances are equal
+    use_left = (left_dist < right_dist) | (
+        (left_dist == right_dist) & (left_ids < right_ids)
+    )
+    return np.where(use_left, left_ids, right_ids)
+
+
 def plot_accuracy(ax: plt.axes, accuracy_list: list, val_accuracy_list: list) -> None:
     """Plots accuracy vs training epoch."""
     print("Plotting accuracy curve.")
@@ -142,7 +440,7 @@ def plot_correlation_matrix(ax, corr_matrix_dict, matrix_key="bkg"):
     # Get matrix
     corr_matrix = corr_matrix_dict[matrix_key]
     # Generate a mask for the upper triangle
-    mask = np.triu(np.ones_like(corr_matrix, dtype=np.bool))
+    mask = ~np.tri(*corr_matrix.shape, k=-1, dtype=bool)
     # Generate a custom diverging colormap
     cmap = sns.diverging_palette(220, 10, as_cmap=True)
     # Draw the heatmap with the mask and correct aspect ratio
@@ -159,6 +457,21 @@ def plot_correlation_matrix(ax, corr_matrix_dict, matrix_key="bkg"):
     )
 
 
+def _get_shuffled_auc(x_plot, y_plot, model, shuffle_col):
+    """Returns auc of processed array with one feature column shuffled.
+
+    Note:
+        The column is shuffled in place and restored after prediction.
+
+    """
+    col_backup = x_plot[:, shuffle_col].copy()
+    # randomize x values but don't change overall distribution
+    array_utils.reset_col(x_plot, x_plot, col=shuffle_col, inplace=True)
+    y_pred = _predict(model, train_utils.get_valid_feature(x_plot))
+    x_plot[:, shuffle_col] = col_backup
+    return roc_auc_score(y_plot, y_pred, sample_weight=x_plot[:, -1])
+
+
 def plot_feature_importance(ax, model_wrapper, log=True, max_feature=16):
     """Calculates importance of features and sort the feature.
 
@@ -179,14 +492,16 @@ def plot_feature_importance(ax, model_wrapper, log=True, max_feature=16):
         reset_mass=False,
         use_selected=False,
     )
-    xs = xs_test
-    xb = xb_test
-    base_auc = calculate_auc(xs, xb, model, rm_last_two=True)
+    # Predict the unshuffled test arrays only once
+    w_plot, y_plot, y_pred = process_array(xs_test, xb_test, model, rm_last_two=True)
+    base_auc = roc_auc_score(y_plot, y_pred, sample_weight=w_plot)
     print("base auc:", base_auc)
+    # columns of one reused concatenated buffer are shuffled in turn
+    x_plot = np.concatenate((xs_test, xb_test))
     # Calculate importance
     for num, feature_name in enumerate(selected_feature_names):
-        current_auc = calculate_auc(xs, xb, model, shuffle_col=num, rm_last_two=True)
-        feature_importance[num] = (1 - current_auc) / (1 - base_auc)
+        shuffled_auc = _get_shuffled_auc(x_plot, y_plot, model, num)
+        feature_importance[num] = (1 - shuffled_auc) / (1 - base_auc)
         print(feature_name, ":", feature_importance[num])
     # Sort
     sort_list = np.flip(np.argsort(feature_importance))
@@ -223,8 +538,16 @@ def plot_input_distributions(
     save_fig=False,
     save_dir=None,
     save_format="png",
+    n_jobs=1,
 ):
-    """Plots input distributions comparision plots for sig/bkg/data"""
+    """Plots input distributions comparision plots for sig/bkg/data
+
+    Note:
+        Features are plotted serially by default. With n_jobs > 1 they are
+        plotted in parallel processes with joblib, each worker imports
+        tensorflow/ROOT again, so keep n_jobs small.
+
+    """
     print("Plotting input distributions.")
     config = {}
     if style_cfg_path is not None:
@@ -240,149 +563,183 @@ def plot_input_distributions(
     else:
         bkg_array = model_wrapper.feedbox.get_array("xb", "raw", array_key=bkg_key)
         sig_array = model_wrapper.feedbox.get_array("xs", "raw", array_key=sig_key)
-    bkg_fill_weights = np.reshape(bkg_array[:, -1], (-1, 1))
-    sig_fill_weights = np.reshape(sig_array[:, -1], (-1, 1))
+    bkg_fill_weights = bkg_array[:, -1]
+    sig_fill_weights = sig_array[:, -1]
     if plot_density:
         bkg_fill_weights = bkg_fill_weights / np.sum(bkg_fill_weights)
         sig_fill_weights = sig_fill_weights / np.sum(sig_fill_weights)
     # get fill weights with dnn cut
+    bkg_fill_weights_dnn = None
+    sig_fill_weights_dnn = None
     if dnn_cut is not None:
         assert dnn_cut >= 0 and dnn_cut <= 1, "dnn_cut out or range."
-        model_meta = model_wrapper.model_meta
         # prepare signal
-        sig_arr_temp = sig_array.copy()
-        sig_arr_temp[:, 0:-2] = train_utils.norarray(
-            sig_arr_temp[:, 0:-2],
-            average=np.array(model_meta["norm_average"]),
-            variance=np.array(model_meta["norm_variance"]),
+        _, sig_predictions, _ = _get_cached_predictions(model_wrapper, "xs", sig_key)
+        sig_fill_weights_dnn = np.where(
+            sig_predictions.ravel() < dnn_cut, 0, sig_fill_weights.ravel()
         )
-        sig_selected_arr = train_utils.get_valid_feature(sig_arr_temp)
-        sig_predictions = model_wrapper.get_model().predict(sig_selected_arr)
-        sig_cut_index = array_utils.get_cut_index(sig_predictions, [dnn_cut], ["<"])
-        sig_fill_weights_dnn = sig_fill_weights.copy()
-        sig_fill_weights_dnn[sig_cut_index] = 0
         # prepare background
-        bkg_arr_temp = bkg_array.copy()
-        bkg_arr_temp[:, 0:-2] = train_utils.norarray(
-            bkg_arr_temp[:, 0:-2],
-            average=np.array(model_meta["norm_average"]),
-            variance=np.array(model_meta["norm_variance"]),
+        _, bkg_predictions, _ = _get_cached_predictions(model_wrapper, "xb", bkg_key)
+        bkg_fill_weights_dnn = np.where(
+            bkg_predictions.ravel() < dnn_cut, 0, bkg_fill_weights.ravel()
         )
-        bkg_selected_arr = train_utils.get_valid_feature(bkg_arr_temp)
-        bkg_predictions = model_wrapper.get_model().predict(bkg_selected_arr)
-        bkg_cut_index = array_utils.get_cut_index(bkg_predictions, [dnn_cut], ["<"])
-        bkg_fill_weights_dnn = bkg_fill_weights.copy()
-        bkg_fill_weights_dnn[bkg_cut_index] = 0
         # normalize weights for density plots
         if plot_density:
             bkg_fill_weights_dnn = bkg_fill_weights_dnn / np.sum(bkg_fill_weights_dnn)
             sig_fill_weights_dnn = sig_fill_weights_dnn / np.sum(sig_fill_weights_dnn)
-    # prepare thresholds
-    for feature_id, feature in enumerate(model_wrapper.selected_features):
-        bkg_fill_array = np.reshape(bkg_array[:, feature_id], (-1, 1))
-        sig_fill_array = np.reshape(sig_array[:, feature_id], (-1, 1))
-        # prepare background histogram
-        hist_bkg = th1_tools.TH1FTool(
-            feature + "_bkg", "bkg", nbin=100, xlow=-20, xup=20
+    # worker processes don't inherit the ROOT error level set by job_executor
+    root_error_level = None
+    if n_jobs != 1:
+        root_error_level = ROOT.gErrorIgnoreLevel
+    # histograms are drawn and saved by _plot_one_feature, in workers if n_jobs > 1
+    joblib.Parallel(n_jobs=n_jobs, backend="loky")(
+        joblib.delayed(_plot_one_feature)(
+            feature_id,
+            feature,
+            bkg_array,
+            sig_array,
+            bkg_fill_weights,
+            sig_fill_weights,
+            bkg_fill_weights_dnn,
+            sig_fill_weights_dnn,
+            compare_cut_sb_separated=compare_cut_sb_separated,
+            config=config,
+            save_dir=save_dir,
+            save_format=save_format,
+            root_error_level=root_error_level,
         )
-        hist_bkg.reinitial_hist_with_fill_array(bkg_fill_array)
-        hist_bkg.fill_hist(bkg_fill_array, bkg_fill_weights)
-        hist_bkg.set_config(config)
-        hist_bkg.update_config("hist", "SetLineColor", 4)
-        hist_bkg.update_config("hist", "SetFillStyle", 3354)
-        hist_bkg.update_config("hist", "SetFillColor", ROOT.kBlue)
-        hist_bkg.update_config("x_axis", "SetTitle", feature)
-        hist_bkg.apply_config()
-        # prepare signal histogram
-        hist_sig = th1_tools.TH1FTool(
-            feature + "_sig", "sig", nbin=100, xlow=-20, xup=20
+        for feature_id, feature in enumerate(model_wrapper.selected_features)
+    )
+
+
+def _plot_one_feature(
+    feature_id,
+    feature,
+    bkg_array,
+    sig_array,
+    bkg_fill_weights,
+    sig_fill_weights,
+    bkg_fill_weights_dnn=None,
+    sig_fill_weights_dnn=None,
+    compare_cut_sb_separated=False,
+    config=None,
+    save_dir=None,
+    save_format="png",
+    root_error_level=None,
+):
+    """Plots and saves sig/bkg distributions of one input feature.
+
+    Note:
+        Histograms with dnn cut are plotted if dnn cut fill weights are given.
+        ROOT error level is only set if root_error_level is given, which is
+        the case for joblib worker processes.
+
+    """
+    if config is None:
+        config = {}
+    if root_error_level is not None:
+        ROOT.gROOT.ProcessLine("gErrorIgnoreLevel = {};".format(root_error_level))
+    apply_dnn_cut = bkg_fill_weights_dnn is not None
+    bkg_fill_array = np.reshape(bkg_array[:, feature_id], (-1, 1))
+    sig_fill_array = np.reshape(sig_array[:, feature_id], (-1, 1))
+    # prepare background histogram
+    hist_bkg = th1_tools.TH1FTool(feature + "_bkg", "bkg", nbin=100, xlow=-20, xup=20)
+    hist_bkg.reinitial_hist_with_fill_array(bkg_fill_array)
+    fill_th1_with_numpy(hist_bkg, bkg_fill_array, bkg_fill_weights)
+    hist_bkg.set_config(config)
+    hist_bkg.update_config("hist", "SetLineColor", 4)
+    hist_bkg.update_config("hist", "SetFillStyle", 3354)
+    hist_bkg.update_config("hist", "SetFillColor", ROOT.kBlue)
+    hist_bkg.update_config("x_axis", "SetTitle", feature)
+    hist_bkg.apply_config()
+    # prepare signal histogram
+    hist_sig = th1_tools.TH1FTool(feature + "_sig", "sig", nbin=100, xlow=-20, xup=20)
+    hist_sig.reinitial_hist_with_fill_array(sig_fill_array)
+    fill_th1_with_numpy(hist_sig, sig_fill_array, sig_fill_weights)
+    hist_sig.set_config(config)
+    hist_sig.update_config("hist", "SetLineColor", 2)
+    hist_sig.update_config("hist", "SetFillStyle", 3354)
+    hist_sig.update_config("hist", "SetFillColor", ROOT.kRed)
+    hist_sig.update_config("x_axis", "SetTitle", feature)
+    hist_sig.apply_config()
+    # prepare bkg/sig histograms with dnn cut
+    if apply_dnn_cut:
+        hist_bkg_dnn = th1_tools.TH1FTool(
+            feature + "_bkg_cut_dnn", "bkg_cut_dnn", nbin=100, xlow=-20, xup=20
         )
-        hist_sig.reinitial_hist_with_fill_array(sig_fill_array)
-        hist_sig.fill_hist(sig_fill_array, sig_fill_weights)
-        hist_sig.set_config(config)
-        hist_sig.update_config("hist", "SetLineColor", 2)
-        hist_sig.update_config("hist", "SetFillStyle", 3354)
-        hist_sig.update_config("hist", "SetFillColor", ROOT.kRed)
-        hist_sig.update_config("x_axis", "SetTitle", feature)
-        hist_sig.apply_config()
-        # prepare bkg/sig histograms with dnn cut
-        if dnn_cut is not None:
-            hist_bkg_dnn = th1_tools.TH1FTool(
-                feature + "_bkg_cut_dnn", "bkg_cut_dnn", nbin=100, xlow=-20, xup=20
-            )
-            hist_bkg_dnn.reinitial_hist_with_fill_array(bkg_fill_array)
-            hist_bkg_dnn.fill_hist(bkg_fill_array, bkg_fill_weights_dnn)
-            hist_bkg_dnn.set_config(config)
-            hist_bkg_dnn.update_config("hist", "SetLineColor", 4)
-            hist_bkg_dnn.update_config("hist", "SetFillStyle", 3001)
-            hist_bkg_dnn.update_config("hist", "SetFillColor", ROOT.kBlue)
-            hist_bkg_dnn.update_config("x_axis", "SetTitle", feature)
-            hist_bkg_dnn.apply_config()
-            hist_sig_dnn = th1_tools.TH1FTool(
-                feature + "_sig_cut_dnn", "sig_cut_dnn", nbin=100, xlow=-20, xup=20
-            )
-            hist_sig_dnn.reinitial_hist_with_fill_array(sig_fill_array)
-            hist_sig_dnn.fill_hist(sig_fill_array, sig_fill_weights_dnn)
-            hist_sig_dnn.set_config(config)
-            hist_sig_dnn.update_config("hist", "SetLineColor", 2)
-            hist_sig_dnn.update_config("hist", "SetFillStyle", 3001)
-            hist_sig_dnn.update_config("hist", "SetFillColor", ROOT.kRed)
-            hist_sig_dnn.update_config("x_axis", "SetTitle", feature)
-            hist_sig_dnn.apply_config()
-        # combined histograms
-        if not compare_cut_sb_separated:
-            if dnn_cut is not None:
-                hist_col = th1_tools.HistCollection(
-                    [hist_bkg_dnn, hist_sig_dnn],
-                    name=feature,
-                    title="input var: " + feature,
-                )
-            else:
-                hist_col = th1_tools.HistCollection(
-                    [hist_bkg, hist_sig], name=feature, title="input var: " + feature
-                )
-            hist_col.draw(
-                draw_options="hist",
-                legend_title="legend",
-                draw_norm=False,
-                remove_empty_ends=True,
-            )
-            hist_col.save(
-                save_dir=save_dir, save_file_name=feature, save_format=save_format
-            )
-        else:
-            hist_col_bkg = th1_tools.HistCollection(
-                [hist_bkg, hist_bkg_dnn],
-                name=feature + "_bkg",
-                title="input var: " + feature,
-            )
-            hist_col_bkg.draw(
-                draw_options="hist",
-                legend_title="legend",
-                draw_norm=False,
-                remove_empty_ends=True,
-            )
-            hist_col_bkg.save(
-                save_dir=save_dir,
-                save_file_name=feature + "_bkg",
-                save_format=save_format,
-            )
-            hist_col_sig = th1_tools.HistCollection(
-                [hist_sig, hist_sig_dnn],
-                name=feature + "_sig",
+        hist_bkg_dnn.reinitial_hist_with_fill_array(bkg_fill_array)
+        fill_th1_with_numpy(hist_bkg_dnn, bkg_fill_array, bkg_fill_weights_dnn)
+        hist_bkg_dnn.set_config(config)
+        hist_bkg_dnn.update_config("hist", "SetLineColor", 4)
+        hist_bkg_dnn.update_config("hist", "SetFillStyle", 3001)
+        hist_bkg_dnn.update_config("hist", "SetFillColor", ROOT.kBlue)
+        hist_bkg_dnn.update_config("x_axis", "SetTitle", feature)
+        hist_bkg_dnn.apply_config()
+        hist_sig_dnn = th1_tools.TH1FTool(
+            feature + "_sig_cut_dnn", "sig_cut_dnn", nbin=100, xlow=-20, xup=20
+        )
+        hist_sig_dnn.reinitial_hist_with_fill_array(sig_fill_array)
+        fill_th1_with_numpy(hist_sig_dnn, sig_fill_array, sig_fill_weights_dnn)
+        hist_sig_dnn.set_config(config)
+        hist_sig_dnn.update_config("hist", "SetLineColor", 2)
+        hist_sig_dnn.update_config("hist", "SetFillStyle", 3001)
+        hist_sig_dnn.update_config("hist", "SetFillColor", ROOT.kRed)
+        hist_sig_dnn.update_config("x_axis", "SetTitle", feature)
+        hist_sig_dnn.apply_config()
+    # combined histograms
+    if not compare_cut_sb_separated:
+        if apply_dnn_cut:
+            hist_col = th1_tools.HistCollection(
+                [hist_bkg_dnn, hist_sig_dnn],
+                name=feature,
                 title="input var: " + feature,
             )
-            hist_col_sig.draw(
-                draw_options="hist",
-                legend_title="legend",
-                draw_norm=False,
-                remove_empty_ends=True,
-            )
-            hist_col_sig.save(
-                save_dir=save_dir,
-                save_file_name=feature + "_sig",
-                save_format=save_format,
+        else:
+            hist_col = th1_tools.HistCollection(
+                [hist_bkg, hist_sig], name=feature, title="input var: " + feature
             )
+        hist_col.draw(
+            draw_options="hist",
+            legend_title="legend",
+            draw_norm=False,
+            remove_empty_ends=True,
+        )
+        hist_col.save(
+            save_dir=save_dir, save_file_name=feature, save_format=save_format
+        )
+    else:
+        hist_col_bkg = th1_tools.HistCollection(
+            [hist_bkg, hist_bkg_dnn],
+            name=feature + "_bkg",
+            title="input var: " + feature,
+        )
+        hist_col_bkg.draw(
+            draw_options="hist",
+            legend_title="legend",
+            draw_norm=False,
+            remove_empty_ends=True,
+        )
+        hist_col_bkg.save(
+            save_dir=save_dir,
+            save_file_name=feature + "_bkg",
+            save_format=save_format,
+        )
+        hist_col_sig = th1_tools.HistCollection(
+            [hist_sig, hist_sig_dnn],
+            name=feature + "_sig",
+            title="input var: " + feature,
+        )
+        hist_col_sig.draw(
+            draw_options="hist",
+            legend_title="legend",
+            draw_norm=False,
+            remove_empty_ends=True,
+        )
+        hist_col_sig.save(
+            save_dir=save_dir,
+            save_file_name=feature + "_sig",
+            save_format=save_format,
+        )
 
 
 def plot_overtrain_check(ax, model_wrapper, bins=50, range=(-0.25, 1.25), log=True):
@@ -428,9 +785,9 @@ def plot_overtrain_check(ax, model_wrapper, bins=50, range=(-0.25, 1.25), log=Tr
     # plot train scores
     make_bar_plot(
         ax,
-        model.predict(xb_train_selected),
+        _predict(model, xb_train_selected),
         "b-train",
-        weights=np.reshape(xb_train[:, -1], (-1, 1)),
+        weights=xb_train[:, -1],
         bins=bins,
         range=range,
         density=True,
@@ -440,9 +797,9 @@ def plot_overtrain_check(ax, model_wrapper, bins=50, range=(-0.25, 1.25), log=Tr
     )
     make_bar_plot(
         ax,
-        model.predict(xs_train_selected),
+        _predict(model, xs_train_selected),
         "s-train",
-        weights=np.reshape(xs_train[:, -1], (-1, 1)),
+        weights=xs_train[:, -1],
         bins=bins,
         range=range,
         density=True,
@@ -507,9 +864,9 @@ def plot_overtrain_check_original_mass(
     # plot train scores
     make_bar_plot(
         ax,
-        model.predict(xb_train_selected_original_mass),
+        _predict(model, xb_train_selected_original_mass),
         "b-train",
-        weights=np.reshape(xb_train_original_mass[:, -1], (-1, 1)),
+        weights=xb_train_original_mass[:, -1],
         bins=bins,
         range=range,
         density=True,
@@ -519,9 +876,9 @@ def plot_overtrain_check_original_mass(
     )
     make_bar_plot(
         ax,
-        model.predict(xs_train_selected_original_mass),
+        _predict(model, xs_train_selected_original_mass),
         "s-train",
-        weights=np.reshape(xs_train_original_mass[:, -1], (-1, 1)),
+        weights=xs_train_original_mass[:, -1],
         bins=bins,
         range=range,
         density=True,
@@ -548,8 +905,8 @@ def plot_loss(ax: plt.axes, loss_list: list, val_loss_list: list) -> None:
 def plot_roc(ax, xs, xb, model, yscal="logit", ylim=(0.1, 1 - 1e-4)):
     """Plots roc curve on given axes."""
     # Get data
-    x_plot, y_plot, y_pred = process_array(xs, xb, model, rm_last_two=True)
-    fpr_dm, tpr_dm, _ = roc_curve(y_plot, y_pred, sample_weight=x_plot[:, -1])
+    w_plot, y_plot, y_pred = process_array(xs, xb, model, rm_last_two=True)
+    fpr_dm, tpr_dm, _ = roc_curve(y_plot, y_pred, sample_weight=w_plot)
     # Make plots
     ax.plot(fpr_dm, tpr_dm)
     ax.set_title("roc curve")
@@ -583,7 +940,7 @@ def plot_scores(
 ):
     """Plots score distribution for siganl and background."""
     ax.hist(
-        model.predict(selected_bkg),
+        _predict(model, selected_bkg),
         weights=bkg_weight,
         bins=bins,
         range=range,
@@ -597,7 +954,7 @@ def plot_scores(
         fill=True,
     )
     ax.hist(
-        model.predict(selected_sig),
+        _predict(model, selected_sig),
         weights=sig_weight,
         bins=bins,
         range=range,
@@ -614,9 +971,9 @@ def plot_scores(
     if apply_data:
         make_bar_plot(
             ax,
-            model.predict(selected_data),
+            _predict(model, selected_data),
             "data",
-            weights=np.reshape(data_weight, (-1, 1)),
+            weights=data_weight,
             bins=bins,
             range=range,
             density=density,
@@ -654,48 +1011,51 @@ def plot_scores_separate(
 
     """
     print("Plotting scores with bkg separated.")
-    predict_arr_list = []
-    predict_arr_weight_list = []
     model = model_wrapper.get_model()
+    norm_model = model_wrapper.get_norm_model()
     feedbox = model_wrapper.feedbox
     model_meta = model_wrapper.model_meta
     # plot background
     if (type(bkg_plot_key_list) is not list) or len(bkg_plot_key_list) == 0:
         # prepare plot key list sort with total weight by default
         original_keys = list(bkg_dict.keys())
-        total_weight_list = []
-        for key in original_keys:
-            total_weight = np.sum((bkg_dict[key])[:, -1])
-            total_weight_list.append(total_weight)
-        sort_indexes = np.argsort(np.array(total_weight_list))
+        total_weight_list = np.fromiter(
+            (np.sum((bkg_dict[key])[:, -1]) for key in original_keys),
+            dtype=np.float64,
+            count=len(original_keys),
+        )
+        sort_indexes = np.argsort(total_weight_list)
         bkg_plot_key_list = [original_keys[index] for index in sort_indexes]
-    for arr_key in bkg_plot_key_list:
-        bkg_arr_temp = bkg_dict[arr_key].copy()
-        bkg_arr_temp[:, 0:-2] = train_utils.norarray(
-            bkg_arr_temp[:, 0:-2],
-            average=np.array(model_meta["norm_average"]),
-            variance=np.array(model_meta["norm_variance"]),
+    if len(bkg_plot_key_list) == 0:
+        warnings.warn("No background sample to plot, skipping background scores.")
+    else:
+        # predict all backgrounds in one batch, then split back by key
+        bkg_sizes = np.fromiter(
+            (len(bkg_dict[key]) for key in bkg_plot_key_list),
+            dtype=np.int64,
+            count=len(bkg_plot_key_list),
         )
-        selected_arr = train_utils.get_valid_feature(bkg_arr_temp)
-        predict_arr_list.append(np.array(model.predict(selected_arr)))
-        predict_arr_weight_list.append(bkg_arr_temp[:, -1])
-    try:
-        ax.hist(
-            np.transpose(predict_arr_list),
-            bins=bins,
-            range=range,
-            weights=np.transpose(predict_arr_weight_list),
-            histtype="bar",
-            label=bkg_plot_key_list,
-            density=density,
-            stacked=True,
+        bkg_offsets = np.concatenate(([0], np.cumsum(bkg_sizes)))
+        bkg_split_ids = bkg_offsets[1:-1]
+        bkg_arr_list = [bkg_dict[key] for key in bkg_plot_key_list]
+        selected_arr = np.empty(
+            (bkg_offsets[-1], bkg_arr_list[0].shape[1] - 2), dtype=np.float32
         )
-    except:
+        bkg_weights = np.empty(bkg_offsets[-1])
+        for bkg_id, bkg_arr in enumerate(bkg_arr_list):
+            start, end = bkg_offsets[bkg_id], bkg_offsets[bkg_id + 1]
+            _get_float32_features(bkg_arr, out=selected_arr[start:end])
+            bkg_weights[start:end] = bkg_arr[:, -1]
+        # per key arrays are views of the contiguous predictions/weights
+        bkg_predictions = _predict(norm_model, selected_arr).ravel()
+        predict_arr_list = np.split(bkg_predictions, bkg_split_ids)
+        predict_arr_weight_list = np.split(bkg_weights, bkg_split_ids)
+        # ax.hist stacks a list of 1D arrays, samples may have different lengths
         ax.hist(
-            predict_arr_list[0],
+            predict_arr_list,
             bins=bins,
             range=range,
-            weights=predict_arr_weight_list[0],
+            weights=predict_arr_weight_list,
             histtype="bar",
             label=bkg_plot_key_list,
             density=density,
@@ -704,20 +1064,13 @@ def plot_scores_separate(
     # plot signal
     if sig_arr is None:
         sig_key = model_meta["sig_key"]
-        xs_reshape = feedbox.get_array("xs", "reshape", array_key=sig_key)
-        selected_arr = train_utils.get_valid_feature(xs_reshape)
-        predict_arr = model.predict(selected_arr)
-        predict_weight_arr = xs_reshape[:, -1]
-    else:
-        sig_arr_temp = sig_arr.copy()
-        sig_arr_temp[:, 0:-2] = train_utils.norarray(
-            sig_arr[:, 0:-2],
-            average=np.array(model_meta["norm_average"]),
-            variance=np.array(model_meta["norm_variance"]),
+        _, predict_arr, predict_weight_arr = _get_cached_predictions(
+            model_wrapper, "xs", sig_key
         )
-        selected_arr = train_utils.get_valid_feature(sig_arr_temp)
-        predict_arr = np.array(model.predict(selected_arr))
-        predict_weight_arr = sig_arr_temp[:, -1]
+    else:
+        selected_arr = _get_float32_features(sig_arr)
+        predict_arr = np.array(_predict(norm_model, selected_arr))
+        predict_weight_arr = sig_arr[:, -1]
     ax.hist(
         predict_arr,
         bins=bins,
@@ -739,9 +1092,9 @@ def plot_scores_separate(
             data_weight = xd[:, -1]
         make_bar_plot(
             ax,
-            model.predict(data_arr),
+            _predict(model, data_arr),
             "data",
-            weights=np.reshape(data_weight, (-1, 1)),
+            weights=data_weight,
             bins=bins,
             range=range,
             density=density,
@@ -785,7 +1138,7 @@ def plot_scores_separate_root(
 
     """
     print("Plotting scores with bkg separated with ROOT.")
-    model = model_wrapper.get_model()
+    norm_model = model_wrapper.get_norm_model()
     feedbox = model_wrapper.feedbox
     model_meta = model_wrapper.model_meta
     bkg_dict = feedbox.xb_dict
@@ -809,17 +1162,21 @@ def plot_scores_separate_root(
             total_weight_list.append(total_weight)
         sort_indexes = np.argsort(np.array(total_weight_list))
         bkg_plot_key_list = [original_keys[index] for index in sort_indexes]
+    # float32 inputs of all backgrounds share one scratch buffer, it can be
+    # reused as predictions are filled to histogram before next background
+    max_len = max((len(bkg_dict[key]) for key in bkg_plot_key_list), default=0)
+    scratch_arr = np.empty(
+        (max_len, len(model_wrapper.selected_features)), dtype=np.float32
+    )
     for arr_key in bkg_plot_key_list:
-        bkg_arr_temp = bkg_dict[arr_key].copy()
-        bkg_arr_temp = array_utils.modify_array(bkg_arr_temp, select_channel=True)
+        # modify_array returns a new array, the one in bkg_dict is untouched
+        bkg_arr_temp = array_utils.modify_array(bkg_dict[arr_key], select_channel=True)
         if len(bkg_arr_temp) != 0:
-            bkg_arr_temp[:, 0:-2] = train_utils.norarray(
-                bkg_arr_temp[:, 0:-2],
-                average=np.array(model_meta["norm_average"]),
-                variance=np.array(model_meta["norm_variance"]),
+            # inputs are normalized in the model, only features are copied
+            selected_arr = _get_float32_features(
+                bkg_arr_temp, out=scratch_arr[: len(bkg_arr_temp)]
             )
-            selected_arr = train_utils.get_valid_feature(bkg_arr_temp)
-            predict_arr = np.array(model.predict(selected_arr))
+            predict_arr = np.array(_predict(norm_model, selected_arr))
             predict_weight_arr = bkg_arr_temp[:, -1]
         else:
             predict_arr = np.array([])
@@ -827,7 +1184,7 @@ def plot_scores_separate_root(
         th1_temp = th1_tools.TH1FTool(
             arr_key, arr_key, nbin=bins, xlow=range[0], xup=range[1]
         )
-        th1_temp.fill_hist(predict_arr, predict_weight_arr)
+        fill_th1_with_numpy(th1_temp, predict_arr, predict_weight_arr)
         hist_list.append(th1_temp)
     hist_stacked_bkgs = th1_tools.THStackTool(
         "bkg stack plot", plot_title, hist_list, canvas=plot_pad_score
@@ -840,20 +1197,13 @@ def plot_scores_separate_root(
     # plot signal
     if sig_arr is None:
         sig_key = model_meta["sig_key"]
-        predict_weight_arr = feedbox.get_array("xs", "reshape", array_key=sig_key)[
-            :, -1
-        ]
-        sig_arr_temp = feedbox.get_array("xs", "raw", array_key=sig_key)
+        _, predict_arr, predict_weight_arr = _get_cached_predictions(
+            model_wrapper, "xs", sig_key
+        )
     else:
         predict_weight_arr = sig_arr[:, -1]
-        sig_arr_temp = sig_arr.copy()
-    sig_arr_temp[:, 0:-2] = train_utils.norarray(
-        sig_arr_temp[:, 0:-2],
-        average=np.array(model_meta["norm_average"]),
-        variance=np.array(model_meta["norm_variance"]),
-    )
-    selected_arr = train_utils.get_valid_feature(sig_arr_temp)
-    predict_arr = model.predict(selected_arr)
+        selected_arr = _get_float32_features(sig_arr)
+        predict_arr = _predict(norm_model, selected_arr)
     if scale_sig:
         sig_title = "sig-scaled"
     else:
@@ -866,7 +1216,7 @@ def plot_scores_separate_root(
         xup=range[1],
         canvas=plot_pad_score,
     )
-    hist_sig.fill_hist(predict_arr, predict_weight_arr)
+    fill_th1_with_numpy(hist_sig, predict_arr, predict_weight_arr)
     total_weight_sig = hist_sig.get_hist().GetSumOfWeights()
     if scale_sig:
         total_weight = hist_stacked_bkgs.get_total_weights()
@@ -894,15 +1244,10 @@ def plot_scores_separate_root(
             data_arr_temp = feedbox.get_array("xd", "raw", array_key=data_key)
         else:
             predict_weight_arr = data_arr[:, -1]
-            data_arr_temp = data_arr.copy()
+            data_arr_temp = data_arr
         data_arr_temp = array_utils.modify_array(data_arr_temp, select_channel=True)
-        data_arr_temp[:, 0:-2] = train_utils.norarray(
-            data_arr_temp[:, 0:-2],
-            average=np.array(model_meta["norm_average"]),
-            variance=np.array(model_meta["norm_variance"]),
-        )
-        selected_arr = train_utils.get_valid_feature(data_arr_temp)
-        predict_arr = model.predict(selected_arr)
+        selected_arr = _get_float32_features(data_arr_temp)
+        predict_arr = _predict(norm_model, selected_arr)
 
         hist_data = th1_tools.TH1FTool(
             "data added",
@@ -912,7 +1257,7 @@ def plot_scores_separate_root(
             xup=range[1],
             canvas=plot_pad_score,
         )
-        hist_data.fill_hist(predict_arr, predict_weight_arr)
+        fill_th1_with_numpy(hist_data, predict_arr, predict_weight_arr)
         hist_data.update_config("hist", "SetMarkerStyle", ROOT.kFullCircle)
         hist_data.update_config("hist", "SetMarkerColor", ROOT.kBlack)
         hist_data.update_config("hist", "SetMarkerSize", 0.8)
@@ -996,8 +1341,8 @@ def plot_significance_scan(
     ax2 = ax.twinx()
     max_sig_events = sig_above_threshold[0]
     max_bkg_events = bkg_above_threshold[0]
-    sig_eff_above_threshold = np.array(sig_above_threshold) / max_sig_events
-    bkg_eff_above_threshold = np.array(bkg_above_threshold) / max_bkg_events
+    sig_eff_above_threshold = sig_above_threshold / max_sig_events
+    bkg_eff_above_threshold = bkg_above_threshold / max_bkg_events
     ax2.plot(plot_thresholds, sig_eff_above_threshold, color="orange", label="sig")
     ax2.plot(plot_thresholds, bkg_eff_above_threshold, color="blue", label="bkg")
     ax2.set_ylabel("sig(bkg) ratio after cut")
@@ -1042,120 +1387,53 @@ def plot_significance_scan(
     model_wrapper.max_significance = max_significance
     model_wrapper.max_significance_threshold = max_significance_threshold
     # make extra cut table 0.1, 0.2 ... 0.8, 0.9
-    # make table for different DNN cut scores
-    save_path = save_dir + "/scan_DNN_cut" + suffix + ".csv"
-    with open(save_path, "w", newline="") as file:
-        writer = csv.writer(file)
-        row_list = [
-            [
-                "DNN cut",
-                "sig events",
-                "sig efficiency",
-                "bkg events",
-                "bkg efficiency",
-                "significance",
-            ]
+    scan_cuts = (100 - np.arange(1, 100)) / 100.0
+    title_row = [
+        "DNN cut",
+        "sig events",
+        "sig efficiency",
+        "bkg events",
+        "bkg efficiency",
+        "significance",
+    ]
+    total_row = [
+        "total sig",
+        max_sig_events,
+        "total bkg",
+        max_bkg_events,
+        "base significance",
+        original_significance,
+    ]
+    # make table for different DNN cut scores, sig efficiency and bkg efficiency
+    for table_name, scan_values in [
+        ("scan_DNN_cut", plot_thresholds),
+        ("scan_sig_eff", sig_eff_above_threshold),
+        ("scan_bkg_eff", bkg_eff_above_threshold),
+    ]:
+        threshold_ids = get_nearest_ids(scan_values, scan_cuts)
+        table_columns = [
+            plot_thresholds[threshold_ids],
+            sig_above_threshold[threshold_ids],
+            sig_eff_above_threshold[threshold_ids],
+            bkg_above_threshold[threshold_ids],
+            bkg_eff_above_threshold[threshold_ids],
+            significances[threshold_ids],
         ]
-        for index in range(1, 100):
-            dnn_cut = (100 - index) / 100.0
-            threshold_id = (np.abs(np.array(plot_thresholds) - dnn_cut)).argmin()
-            sig_events = sig_above_threshold[threshold_id]
-            sig_eff = sig_eff_above_threshold[threshold_id]
-            bkg_events = bkg_above_threshold[threshold_id]
-            bkg_eff = bkg_eff_above_threshold[threshold_id]
-            significance = significances[threshold_id]
-            new_row = [dnn_cut, sig_events, sig_eff, bkg_events, bkg_eff, significance]
-            row_list.append(new_row)
-        row_list.append([""])
-        row_list.append(
-            [
-                "total sig",
-                max_sig_events,
-                "total bkg",
-                max_bkg_events,
-                "base significance",
-                original_significance,
-            ]
-        )
-        writer.writerows(row_list)
-    # make table for different sig efficiency
-    save_path = save_dir + "/scan_sig_eff" + suffix + ".csv"
-    with open(save_path, "w", newline="") as file:
-        writer = csv.writer(file)
-        row_list = [
-            [
-                "DNN cut",
-                "sig events",
-                "sig efficiency",
-                "bkg events",
-                "bkg efficiency",
-                "significance",
-            ]
-        ]
-        for index in range(1, 100):
-            sig_eff_cut = (100 - index) / 100.0
-            threshold_id = (
-                np.abs(np.array(sig_eff_above_threshold) - sig_eff_cut)
-            ).argmin()
-            dnn_cut = plot_thresholds[threshold_id]
-            sig_events = sig_above_threshold[threshold_id]
-            sig_eff = sig_eff_cut
-            bkg_events = bkg_above_threshold[threshold_id]
-            bkg_eff = bkg_eff_above_threshold[threshold_id]
-            significance = significances[threshold_id]
-            new_row = [dnn_cut, sig_events, sig_eff, bkg_events, bkg_eff, significance]
-            row_list.append(new_row)
-        row_list.append([""])
-        row_list.append(
-            [
-                "total sig",
-                max_sig_events,
-                "total bkg",
-                max_bkg_events,
-                "base significance",
-                original_significance,
-            ]
-        )
-        writer.writerows(row_list)
-    # make table for different bkg efficiency
-    save_path = save_dir + "/scan_bkg_eff" + suffix + ".csv"
-    with open(save_path, "w", newline="") as file:
-        writer = csv.writer(file)
-        row_list = [
-            [
-                "DNN cut",
-                "sig events",
-                "sig efficiency",
-                "bkg events",
-                "bkg efficiency",
-                "significance",
-            ]
-        ]
-        for index in range(1, 100):
-            bkg_eff_cut = (100 - index) / 100.0
-            threshold_id = (
-                np.abs(np.array(bkg_eff_above_threshold) - bkg_eff_cut)
-            ).argmin()
-            dnn_cut = plot_thresholds[threshold_id]
-            sig_events = sig_above_threshold[threshold_id]
-            sig_eff = sig_eff_above_threshold[threshold_id]
-            bkg_events = bkg_above_threshold[threshold_id]
-            bkg_eff = bkg_eff_cut
-            significance = significances[threshold_id]
-            new_row = [dnn_cut, sig_events, sig_eff, bkg_events, bkg_eff, significance]
-            row_list.append(new_row)
-        row_list.append([""])
-        row_list.append(
-            [
-                "total sig",
-                max_sig_events,
-                "total bkg",
-                max_bkg_events,
-                "base significance",
-                original_significance,
-            ]
-        )
-        writer.writerows(row_list)
+        # scanned quantity is reported with the cut value itself
+        if table_name == "scan_DNN_cut":
+            table_columns[0] = scan_cuts
+        elif table_name == "scan_sig_eff":
+            table_columns[2] = scan_cuts
+        else:
+            table_columns[4] = scan_cuts
+        save_path = save_dir + "/" + table_name + suffix + ".csv"
+        with open(save_path, "w", newline="") as file:
+            # keep the "\r\n" line ending of csv module output for whole file
+            pd.DataFrame(dict(zip(title_row, table_columns))).to_csv(
+                file, index=False, lineterminator="\r\n"
+            )
+            writer = csv.writer(file, lineterminator="\r\n")
+            writer.writerows([[""], total_row])
 
 
 def plot_train_test_roc(ax, model_wrapper, yscal="logit", ylim=(0.1, 1 - 1e-4)):
@@ -1166,9 +1444,6 @@ def plot_train_test_roc(ax, model_wrapper, yscal="logit", ylim=(0.1, 1 - 1e-4)):
     model_meta = model_wrapper.model_meta
     sig_key = model_meta["sig_key"]
     bkg_key = model_meta["bkg_key"]
-    (_, _, _, _, xs_train, xs_test, xb_train, xb_test,) = feedbox.get_train_test_arrays(
-        sig_key=sig_key, bkg_key=bkg_key, use_selected=False
-    )
     (
         _,
         _,
@@ -1181,6 +1456,21 @@ def plot_train_test_roc(ax, model_wrapper, yscal="logit", ylim=(0.1, 1 - 1e-4)):
     ) = feedbox.get_train_test_arrays(
         sig_key=sig_key, bkg_key=bkg_key, use_selected=False, reset_mass=False
     )
+    # arrays are split only once, mass reset only changes bkg mass column so
+    # it is done on copies of the original mass arrays
+    xs_train = xs_train_original_mass
+    xs_test = xs_test_original_mass
+    if feedbox.reset_mass:
+        xs_reference = np.concatenate((xs_train_original_mass, xs_test_original_mass))
+        xb_train = array_utils.reset_col(
+            xb_train_original_mass, xs_reference, col=feedbox.reset_mass_id
+        )
+        xb_test = array_utils.reset_col(
+            xb_test_original_mass, xs_reference, col=feedbox.reset_mass_id
+        )
+    else:
+        xb_train = xb_train_original_mass
+        xb_test = xb_test_original_mass
     # First plot roc for train dataset
     auc_train, _, _ = plot_roc(ax, xs_train, xb_train, model)
     # Then plot roc for test dataset
@@ -1225,21 +1515,36 @@ def plot_train_test_roc(ax, model_wrapper, yscal="logit", ylim=(0.1, 1 - 1e-4)):
 
 
 def process_array(xs, xb, model, shuffle_col=None, rm_last_two=False):
-    """Process sig/bkg arrays in the same way for training arrays."""
+    """Process sig/bkg arrays in the same way for training arrays.
+
+    Returns:
+        Tuple of (weights, y_proc, y_pred) for sig entries followed by bkg
+        entries
+
+    """
     # Get data
-    xs_proc = xs.copy()
-    xb_proc = xb.copy()
-    x_proc = np.concatenate((xs_proc, xb_proc))
     if shuffle_col is not None:
         # randomize x values but don't change overall distribution
-        x_proc = array_utils.reset_col(x_proc, x_proc, shuffle_col)
+        x_proc = np.concatenate((xs, xb))
+        array_utils.reset_col(x_proc, x_proc, shuffle_col, inplace=True)
+        xs_proc = x_proc[: len(xs)]
+        xb_proc = x_proc[len(xs) :]
+    else:
+        # sig/bkg are predicted separately, no concatenated copy is needed
+        xs_proc = xs
+        xb_proc = xb
     if rm_last_two:
-        x_proc_selected = train_utils.get_valid_feature(x_proc)
+        xs_proc_selected = train_utils.get_valid_feature(xs_proc)
+        xb_proc_selected = train_utils.get_valid_feature(xb_proc)
     else:
-        x_proc_selected = x_proc
+        xs_proc_selected = xs_proc
+        xb_proc_selected = xb_proc
+    w_proc = np.concatenate((xs_proc[:, -1], xb_proc[:, -1]))
     y_proc = np.concatenate((np.ones(xs_proc.shape[0]), np.zeros(xb_proc.shape[0])))
-    y_pred = model.predict(x_proc_selected)
-    return x_proc, y_proc, y_pred
+    y_pred = np.concatenate(
+        (_predict(model, xs_proc_selected), _predict(model, xb_proc_selected))
+    )
+    return w_proc, y_proc, y_pred
 
 
 def make_bar_plot(
@@ -1268,52 +1573,51 @@ def make_bar_plot(
     """
     plt.ioff()
     # Check input
-    data_1dim = np.array([])
-    weight_1dim = np.array([])
     if isinstance(datas, np.ndarray):
         datas = [datas]
         weights = [weights]
+    data_list = []
+    weight_list = []
     for data, weight in zip(datas, weights):
         assert isinstance(data, np.ndarray), "datas element should be numpy array."
         assert isinstance(weight, np.ndarray), "weights element should be numpy array."
+        # column arrays like model predictions are flattened here once
+        data = np.ravel(data)
+        weight = np.ravel(weight)
         assert (
             data.shape == weight.shape
         ), "Input weights should be None or have same type as arrays."
-        if len(data_1dim) == 0:
-            data_1dim = data
-            weight_1dim = weight
-        else:
-            data_1dim = np.concatenate((data_1dim, data))
-            weight_1dim = np.concatenate((weight_1dim, weight))
+        data_list.append(data)
+        weight_list.append(weight)
+    data_1dim = np.concatenate(data_list)
+    weight_1dim = np.concatenate(weight_list)
 
     # Scale x axis
     if x_scale is not None:
         data_1dim = data_1dim * x_scale
     # Make bar plot
     # get bin error and edges
-    plot_ys, _ = np.histogram(
-        data_1dim, bins=bins, range=range, weights=weight_1dim, density=density
-    )
-    sum_weight_squares, bin_edges = np.histogram(
-        data_1dim, bins=bins, range=range, weights=np.power(weight_1dim, 2)
+    if range is not None:
+        hist_range = range
+    else:
+        hist_range = (np.min(data_1dim), np.max(data_1dim))
+        if hist_range[0] == hist_range[1]:
+            hist_range = (hist_range[0] - 0.5, hist_range[1] + 0.5)
+    plot_ys, sum_weight_squares = _uniform_hist_w_w2(
+        data_1dim, weight_1dim, hist_range[0], hist_range[1], bins
     )
+    bin_edges = np.linspace(hist_range[0], hist_range[1], bins + 1)
     if density:
+        plot_ys = plot_ys / np.diff(bin_edges) / plot_ys.sum()
         error_scale = 1 / (np.sum(weight_1dim) * (range[1] - range[0]) / bins)
         errors = np.sqrt(sum_weight_squares) * error_scale
     else:
         errors = np.sqrt(sum_weight_squares)
     # Only plot ratio when bin is not 0.
-    bin_centers = np.array([])
-    bin_ys = np.array([])
-    bin_yerrs = np.array([])
-    for i, y1 in enumerate(plot_ys):
-        if y1 != 0:
-            ele_center = np.array([0.5 * (bin_edges[i] + bin_edges[i + 1])])
-            bin_centers = np.concatenate((bin_centers, ele_center))
-            ele_y = np.array([y1])
-            bin_ys = np.concatenate((bin_ys, ele_y))
-            ele_yerr = np.array([errors[i]])
-            bin_yerrs = np.concatenate((bin_yerrs, ele_yerr))
+    nz = plot_ys != 0
+    bin_centers = 0.5 * (bin_edges[:-1] + bin_edges[1:])[nz]
+    bin_ys = plot_ys[nz]
+    bin_yerrs = errors[nz]
     # plot bar
     bin_size = bin_edges[1] - bin_edges[0]
     if use_error:
@@ -1368,25 +1672,16 @@ def plot_2d_density(
 
     """
     model_wrapper = job_wrapper.model_wrapper
-    feedbox = model_wrapper.feedbox
     model_meta = model_wrapper.model_meta
     # plot signal
     sig_key = model_meta["sig_key"]
-    sig_arr_original = feedbox.get_array("xs", "raw", array_key=sig_key)
-    sig_arr_temp = feedbox.get_array("xs", "raw", array_key=sig_key)
-    sig_arr_temp[:, 0:-2] = train_utils.norarray(
-        sig_arr_temp[:, 0:-2],
-        average=np.array(model_meta["norm_average"]),
-        variance=np.array(model_meta["norm_variance"]),
-    )
-    selected_arr = train_utils.get_valid_feature(sig_arr_temp)
-    predict_arr = model_wrapper.get_model().predict(selected_arr)
+    # predictions are shared with other plots, raw array is not normalized
+    sig_arr, predict_arr, w = _get_cached_predictions(model_wrapper, "xs", sig_key)
     mass_index = job_wrapper.selected_features.index(job_wrapper.reset_feature_name)
     x = predict_arr
-    y = sig_arr_original[:, mass_index]
-    w = sig_arr_temp[:, -1]
+    y = sig_arr[:, mass_index]
     ## make plot
-    plot_canvas = ROOT.TCanvas("2d_density_sig", "2d_density_sig", 1200, 900)
+    plot_canvas = _canvas("2d_density_sig", 1200, 900)
     hist_sig = th1_tools.TH2FTool(
         "2d_density_sig",
         "2d_density_sig",
@@ -1397,7 +1692,7 @@ def plot_2d_density(
         ylow=min(y),
         yup=max(y),
     )
-    hist_sig.fill_hist(fill_array_x=x, fill_array_y=y, weight_array=w)
+    fill_th2_with_numpy(hist_sig, x, y, w)
     hist_sig.set_canvas(plot_canvas)
     hist_sig.set_palette("kBird")
     hist_sig.update_config("hist", "SetStats", 0)
@@ -1407,21 +1702,13 @@ def plot_2d_density(
     hist_sig.save(save_dir=save_dir, save_file_name=save_file_name + "_sig")
     # plot background
     bkg_key = model_meta["bkg_key"]
-    bkg_arr_original = feedbox.get_array("xb", "raw", array_key=bkg_key)
-    bkg_arr_temp = feedbox.get_array("xb", "raw", array_key=bkg_key)
-    bkg_arr_temp[:, 0:-2] = train_utils.norarray(
-        bkg_arr_temp[:, 0:-2],
-        average=np.array(model_meta["norm_average"]),
-        variance=np.array(model_meta["norm_variance"]),
-    )
-    selected_arr = train_utils.get_valid_feature(bkg_arr_temp)
-    predict_arr = model_wrapper.get_model().predict(selected_arr)
+    # predictions are shared with other plots, raw array is not normalized
+    bkg_arr, predict_arr, w = _get_cached_predictions(model_wrapper, "xb", bkg_key)
     mass_index = job_wrapper.selected_features.index(job_wrapper.reset_feature_name)
     x = predict_arr
-    y = bkg_arr_original[:, mass_index]
-    w = bkg_arr_temp[:, -1]
+    y = bkg_arr[:, mass_index]
     ## make plot
-    plot_canvas = ROOT.TCanvas("2d_density_bkg", "2d_density_bkg", 1200, 900)
+    plot_canvas = _canvas("2d_density_bkg", 1200, 900)
     hist_bkg = th1_tools.TH2FTool(
         "2d_density_bkg",
         "2d_density_bkg",
@@ -1432,7 +1719,7 @@ def plot_2d_density(
         ylow=min(y),
         yup=max(y),
     )
-    hist_bkg.fill_hist(fill_array_x=x, fill_array_y=y, weight_array=w)
+    fill_th2_with_numpy(hist_bkg, x, y, w)
     hist_bkg.set_canvas(plot_canvas)
     hist_bkg.set_palette("kBird")
     hist_bkg.update_config("hist", "SetStats", 0)
@@ -1476,62 +1763,73 @@ def plot_2d_significance_scan(
         cut_values=job_wrapper.cut_values,
         cut_types=job_wrapper.cut_types,
     )
+    # mass window cuts only select events, so every event is predicted once
+    # and each mass point scans its window of the same predictions
+    model_wrapper = job_wrapper.model_wrapper
+    feedbox = feed_box.Feedbox(
+        sig_dict,
+        bkg_dict,
+        selected_features=job_wrapper.selected_features,
+        apply_data=False,
+        reshape_array=job_wrapper.norm_array,
+        reset_mass=job_wrapper.reset_feature,
+        reset_mass_name=job_wrapper.reset_feature_name,
+        remove_negative_weight=job_wrapper.rm_negative_weight_events,
+        sig_weight=job_wrapper.sig_sumofweight,
+        bkg_weight=job_wrapper.bkg_sumofweight,
+        data_weight=job_wrapper.data_sumofweight,
+        test_rate=job_wrapper.test_rate,
+        rdm_seed=None,
+        model_meta=model_wrapper.model_meta,
+        verbose=job_wrapper.verbose,
+    )
+    model_wrapper.set_inputs(feedbox, apply_data=job_wrapper.apply_data)
+    sig_arr, sig_predictions, sig_weights = _get_cached_predictions(
+        model_wrapper, "xs", model_wrapper.model_meta["sig_key"]
+    )
+    bkg_arr, bkg_predictions, bkg_weights = _get_cached_predictions(
+        model_wrapper, "xb", model_wrapper.model_meta["bkg_key"]
+    )
+    sig_predictions = np.ravel(sig_predictions)
+    bkg_predictions = np.ravel(bkg_predictions)
+    m_cut_name = job_wrapper.reset_feature_name
+    m_index = job_wrapper.selected_features.index(m_cut_name)
+    sig_mass = sig_arr[:, m_index]
+    bkg_mass = bkg_arr[:, m_index]
     for sig_id, scan_sig_key in enumerate(job_wrapper.sig_list):
-        xs = array_utils.modify_array(sig_dict[scan_sig_key], select_channel=True)
-        m_cut_name = job_wrapper.reset_feature_name
         if cut_ranges_dn is None or len(cut_ranges_dn) == 0:
-            means, variances = train_utils.get_mean_var(
-                xs[:, 0:-2], axis=0, weights=xs[:, -1]
+            xs = array_utils.modify_array(sig_dict[scan_sig_key], select_channel=True)
+            # only the mass column is needed for the mass window
+            m_mean, m_variance = train_utils.get_mean_var_col(
+                xs, m_index, weights=xs[:, -1]
             )
-            m_index = job_wrapper.selected_features.index(m_cut_name)
-            m_cut_dn = means[m_index] - math.sqrt(variances[m_index])
-            m_cut_up = means[m_index] + math.sqrt(variances[m_index])
+            m_cut_dn = m_mean - math.sqrt(m_variance)
+            m_cut_up = m_mean + math.sqrt(m_variance)
         else:
             m_cut_dn = cut_ranges_dn[sig_id]
             m_cut_up = cut_ranges_up[sig_id]
-        feedbox = feed_box.Feedbox(
-            sig_dict,
-            bkg_dict,
-            selected_features=job_wrapper.selected_features,
-            apply_data=False,
-            reshape_array=job_wrapper.norm_array,
-            reset_mass=job_wrapper.reset_feature,
-            reset_mass_name=job_wrapper.reset_feature_name,
-            remove_negative_weight=job_wrapper.rm_negative_weight_events,
-            cut_features=[m_cut_name, m_cut_name],
-            cut_values=[m_cut_dn, m_cut_up],
-            cut_types=[">", "<"],
-            sig_weight=job_wrapper.sig_sumofweight,
-            bkg_weight=job_wrapper.bkg_sumofweight,
-            data_weight=job_wrapper.data_sumofweight,
-            test_rate=job_wrapper.test_rate,
-            rdm_seed=None,
-            model_meta=job_wrapper.model_wrapper.model_meta,
-            verbose=job_wrapper.verbose,
-        )
-        job_wrapper.model_wrapper.set_inputs(feedbox, apply_data=job_wrapper.apply_data)
-        (plot_thresholds, significances, _, _,) = get_significances(
-            job_wrapper.model_wrapper, significance_algo=job_wrapper.significance_algo,
+        sig_in_window = (sig_mass > m_cut_dn) & (sig_mass < m_cut_up)
+        bkg_in_window = (bkg_mass > m_cut_dn) & (bkg_mass < m_cut_up)
+        (
+            plot_thresholds,
+            significances,
+            _,
+            _,
+        ) = get_significances_with_predictions(
+            sig_predictions[sig_in_window],
+            sig_weights[sig_in_window],
+            bkg_predictions[bkg_in_window],
+            bkg_weights[bkg_in_window],
+            significance_algo=job_wrapper.significance_algo,
         )
-        plot_significances = []
-        for dnn_cut in dnn_cut_list:
-            threshold_id = (np.abs(np.array(plot_thresholds) - dnn_cut)).argmin()
-            plot_significances.append(significances[threshold_id])
-        w_inputs.append(plot_significances)
-    x = []
-    y = []
-    w = []
-    for index, w_input in enumerate(w_inputs):
-        if len(x) == 0:
-            x = dnn_cut_list.tolist()
-            y = [job_wrapper.sig_list[index]] * len(w_input)
-            w = w_input
-        else:
-            x += dnn_cut_list.tolist()
-            y += [job_wrapper.sig_list[index]] * len(w_input)
-            w += w_input
+        threshold_ids = get_nearest_ids(plot_thresholds, dnn_cut_list)
+        w_inputs.append(significances[threshold_ids])
+    # one row of significances for each mass point
+    x = np.tile(dnn_cut_list, len(w_inputs))
+    y = np.repeat(job_wrapper.sig_list, len(dnn_cut_list)).tolist()
+    w = np.array(w_inputs).ravel()
     # make plot
-    plot_canvas = ROOT.TCanvas("2d_significance_c", "2d_significance_c", 1200, 900)
+    plot_canvas = _canvas("2d_significance_c", 1200, 900)
     hist_sig = th1_tools.TH2FTool(
         "2d_significance",
         "2d_significance",
@@ -19,7 +19,7 @@ from eli5.sklearn import PermutationImportance
 from keras import backend as K
 from keras.callbacks import TensorBoard, ModelCheckpoint
 import keras.callbacks as callbacks
-from keras.layers import Concatenate, Dense, Dropout, Input, Layer
+from keras.layers import Concatenate, Dense, Dropout, Input, Lambda, Layer
 from keras.layers.normalization import BatchNormalization
 from keras.models import Model, Sequential
 from keras.optimizers import SGD, Adagrad, Adam, RMSprop
@@ -159,10 +159,45 @@ class Model_Sequential_Base(Model_Base):
             "norm_average": None,
             "norm_variance": None,
         }
+        # Evaluation memos, see evaluate._get_cached_predictions
+        self._reset_evaluation_cache()
         # Report
         self.save_tb_logs = save_tb_logs
         self.tb_logs_path = tb_logs_path
 
+    @property
+    def norm_avg(self):
+        """Normalization averages of input features as float32 array."""
+        if self._norm_avg is None:
+            self._norm_avg = np.asarray(
+                self.model_meta["norm_average"], dtype=np.float32
+            )
+        return self._norm_avg
+
+    @property
+    def norm_var(self):
+        """Normalization variances of input features as float32 array."""
+        if self._norm_var is None:
+            self._norm_var = np.asarray(
+                self.model_meta["norm_variance"], dtype=np.float32
+            )
+        return self._norm_var
+
+    @property
+    def norm_inv_std(self):
+        """Inverse standard deviations, normalization becomes a multiply."""
+        if self._norm_inv_std is None:
+            self._norm_inv_std = (1.0 / np.sqrt(self.norm_var)).astype(np.float32)
+        return self._norm_inv_std
+
+    def _reset_evaluation_cache(self):
+        """Clears memos used in evaluation after inputs or model are changed."""
+        self._pred_cache = {}
+        self._norm_avg = None
+        self._norm_var = None
+        self._norm_inv_std = None
+        self._norm_model = None
+
     def compile(self):
         """ Compile model, function to be changed in the future.
 
@@ -178,6 +213,23 @@ class Model_Sequential_Base(Model_Base):
             warnings.warn("Model is not compiled")
         return self.model
 
+    def get_norm_model(self):
+        """Returns model with input normalization prepended.
+
+        Raw selected features can be predicted directly, the normalization is
+        done by the backend as the first layer instead of a numpy pass.
+
+        """
+        if self._norm_model is None:
+            norm_avg = self.norm_avg
+            norm_inv_std = self.norm_inv_std
+            norm_input = Input(shape=(len(norm_avg),))
+            norm_output = Lambda(lambda x: (x - norm_avg) * norm_inv_std)(norm_input)
+            self._norm_model = Model(
+                inputs=norm_input, outputs=self.get_model()(norm_output)
+            )
+        return self._norm_model
+
     def get_train_history(self):
         """Returns train history."""
         if not self.model_is_compiled:
@@ -264,6 +316,7 @@ class Model_Sequential_Base(Model_Base):
         )  # it's important to specify
         # custom objects
         self.model_is_loaded = True
+        self._reset_evaluation_cache()
         # Load parameters
         try:
             paras_path = model_dir + "/" + model_name + "_paras.json"
@@ -282,6 +335,7 @@ class Model_Sequential_Base(Model_Base):
         self.model = keras.models.load_model(
             model_path, custom_objects={"plain_acc": plain_acc},
         )  # it's important to specify
+        self._reset_evaluation_cache()
         if paras_path is not None:
             try:
                 self.load_model_parameters(paras_path)
@@ -304,6 +358,7 @@ class Model_Sequential_Base(Model_Base):
         self.model_label = paras_dict["model_label"]
         self.model_hypers = paras_dict["model_hypers"]
         self.model_meta = paras_dict["model_meta"]
+        self._reset_evaluation_cache()
         self.model_name = paras_dict["model_name"]
         self.model_note = paras_dict["model_note"]
         self.train_history_accuracy = paras_dict["train_history_accuracy"]
@@ -367,6 +422,7 @@ class Model_Sequential_Base(Model_Base):
         self.array_prepared = feedbox.array_prepared
         self.model_meta["norm_average"] = feedbox.norm_means.tolist()
         self.model_meta["norm_variance"] = feedbox.norm_variances.tolist()
+        self._reset_evaluation_cache()
 
     def show_performance(
         self,
@@ -557,6 +613,7 @@ class Model_Sequential_Base(Model_Base):
         ]
         # update status
         self.model_is_trained = True
+        self._reset_evaluation_cache()
 
     def tuning_train(
         self,
@@ -635,6 +692,7 @@ class Model_Sequential_Base(Model_Base):
         )
         # update status
         self.model_is_trained = True
+        self._reset_evaluation_cache()
         return score[0]
 
 
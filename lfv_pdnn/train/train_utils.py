@@ -19,6 +19,15 @@ from sklearn.metrics import accuracy_score, auc, classification_report
 
 from lfv_pdnn.common import array_utils
 
+try:
+    import numba
+except ImportError:  # numba is optional, fall back to plain numpy
+    numba = None
+try:
+    import numexpr
+except ImportError:  # numexpr is optional, fall back to plain numpy
+    numexpr = None
+
 
 def calculate_asimov(sig, bkg):
     return sqrt(2 * ((sig + bkg) * log(1 + sig / bkg) - sig))
@@ -59,6 +68,86 @@ def calculate_significance(sig, bkg, sig_total=1, bkg_total=1, algo="asimov"):
         return calculate_asimov(sig, bkg)
 
 
+def calculate_asimov_array(sig, bkg):
+    """Vectorized version of calculate_asimov for numpy arrays."""
+    if numba is not None:
+        return _asimov_array_kernel(
+            np.ascontiguousarray(sig, dtype=np.float64),
+            np.ascontiguousarray(bkg, dtype=np.float64),
+        )
+    return np.sqrt(2 * ((sig + bkg) * np.log(1 + sig / bkg) - sig))
+
+
+if numba is not None:
+
+    # eager signature, kernel is compiled at import instead of first scan
+    @numba.njit(
+        "float64[:](float64[:], float64[:])", parallel=True, cache=True, fastmath=True
+    )
+    def _asimov_array_kernel(sig, bkg):
+        """Returns asimov significances, loop is split over threads by prange."""
+        out = np.empty_like(sig)
+        for i in numba.prange(sig.shape[0]):
+            out[i] = sqrt(2 * ((sig[i] + bkg[i]) * log(1 + sig[i] / bkg[i]) - sig[i]))
+        return out
+
+
+def calculate_significance_array(sig, bkg, sig_total=1, bkg_total=1, algo="asimov"):
+    """Returns significances for arrays of sig/bkg weights.
+
+    Note:
+        Same algorithms as calculate_significance, entries with non-positive
+        sig/bkg value are set to default value 0.
+
+    """
+    sig = np.asarray(sig, dtype=np.float64)
+    bkg = np.asarray(bkg, dtype=np.float64)
+    significances = np.zeros(sig.shape)
+    # check input
+    if sig_total <= 0 or bkg_total <= 0:
+        warnings.warn(
+            "non-positive value found during significance calculation, using default value 0."
+        )
+        return significances
+    valid = (sig > 0) & (bkg > 0)
+    if not np.all(valid):
+        warnings.warn(
+            "non-positive value found during significance calculation, using default value 0."
+        )
+    if "_rel" in algo:
+        if sig_total == 1 or bkg_total == 1:
+            warnings.warn(
+                "sig_total or bkg_total value is equal to default 1, please check input."
+            )
+    sig = sig[valid]
+    bkg = bkg[valid]
+    # calculation
+    if algo == "asimov":
+        significances[valid] = calculate_asimov_array(sig, bkg)
+    elif algo == "s_b":
+        significances[valid] = sig / bkg
+    elif algo == "s_sqrt_b":
+        significances[valid] = sig / np.sqrt(bkg)
+    elif algo == "s_sqrt_sb":
+        significances[valid] = sig / np.sqrt(sig + bkg)
+    elif algo == "asimov_rel":
+        significances[valid] = calculate_asimov_array(sig, bkg) / calculate_asimov(
+            sig_total, bkg_total
+        )
+    elif algo == "s_b_rel":
+        significances[valid] = (sig / sig_total) / (bkg / bkg_total)
+    elif algo == "s_sqrt_b_rel":
+        significances[valid] = (sig / sig_total) / np.sqrt(bkg / bkg_total)
+    elif algo == "s_sqrt_sb_rel":
+        significances[valid] = (sig / sig_total) / np.sqrt(
+            (bkg + sig) / (sig_total + bkg_total)
+        )
+    else:
+        warnings.warn("Unrecognized significance algorithm, will use default 'asimov'")
+        significances[valid] = calculate_asimov_array(sig, bkg)
+    return significances
+
+
 def get_mass_range(mass_array, weights, nsig=1):
     """Gives a range of mean +- sigma
 
@@ -111,7 +200,7 @@ def generate_shuffle_index(array_len, shuffle_seed=None):
     To use a consist shuffle index to have different arrays shuffle in same way.
 
     """
-    shuffle_index = np.array(range(array_len))
+    shuffle_index = np.arange(array_len)
     if shuffle_seed is not None:
         np.random.seed(shuffle_seed)
     np.random.shuffle(shuffle_index)
@@ -127,6 +216,45 @@ def get_mean_var(array, axis=None, weights=None):
     return average, variance + 0.000001
 
 
+def get_mean_var_col(array, col, weights=None):
+    """Calculate average and variance of one column of an array.
+
+    Same as get_mean_var with axis=0 for a single column, other columns are
+    not traversed.
+
+    """
+    column = np.ascontiguousarray(array[:, col], dtype=np.float64)
+    if weights is None:
+        weights = np.ones(len(column))
+    weights = np.ascontiguousarray(weights, dtype=np.float64)
+    if numba is not None:
+        average, variance = _weighted_mean_var_kernel(column, weights)
+    else:
+        average = np.average(column, weights=weights)
+        variance = np.average((column - average) ** 2, weights=weights)
+    if variance == 0:
+        warnings.warn("Encountered 0 variance, adding shift value 0.000001")
+    return average, variance + 0.000001
+
+
+if numba is not None:
+
+    @numba.njit("UniTuple(float64, 2)(float64[:], float64[:])", cache=True)
+    def _weighted_mean_var_kernel(x, w):
+        """Returns weighted average and variance without temporary arrays."""
+        sum_w = 0.0
+        sum_wx = 0.0
+        for i in range(x.shape[0]):
+            sum_w += w[i]
+            sum_wx += w[i] * x[i]
+        average = sum_wx / sum_w
+        sum_wd2 = 0.0
+        for i in range(x.shape[0]):
+            diff = x[i] - average
+            sum_wd2 += w[i] * diff * diff
+        return average, sum_wd2 / sum_w
+
+
 def norarray(array, average=None, variance=None, axis=None, weights=None):
     """Normalizes input array for each feature.
 
@@ -141,8 +269,27 @@ def norarray(array, average=None, variance=None, axis=None, weights=None):
         if (average is None) or (variance is None):
             print("Warning! unspecified average or variance.")
             average, variance = get_mean_var(array, axis=axis, weights=weights)
-        output_array = (array.copy() - average) / np.sqrt(variance)
-        return output_array
+        # float inputs keep their dtype, so float32 arrays stay float32
+        if np.issubdtype(array.dtype, np.floating):
+            out_dtype = array.dtype
+        else:
+            out_dtype = np.float64
+        if numexpr is not None:
+            # fused subtract/divide without temporary arrays
+            output_array = np.empty(array.shape, dtype=out_dtype)
+            numexpr.evaluate(
+                "(x - m) / sqrt(v)",
+                local_dict={
+                    "x": array,
+                    "m": np.asarray(average, dtype=np.float64),
+                    "v": np.asarray(variance, dtype=np.float64),
+                },
+                out=output_array,
+                casting="same_kind",
+            )
+            return output_array
+        output_array = (array - average) / np.sqrt(variance)
+        return output_array.astype(out_dtype, copy=False)
 
 
 def norarray_min_max(array, min, max, axis=None):
@@ -1,4 +1,5 @@
 import os
+import numpy as np
 from lfv_pdnn.make_array.make_array import dump_flat_ntuple_individual
 
 # Constants
@@ -27,13 +28,13 @@ for camp in ["MC16a", "MC16d", "MC16e"]:
     root_path = ntup_dir + "/" + camp + "/{}.root".format(bkg_name)
     dump_flat_ntuple_individual(root_path, ntuple_name, feature_list,
       arrays_dir + "/" + camp, "{}".format(bkg_name),
-      use_lower_var_name=False)
+      use_lower_var_name=False, dtype=np.float32)
   # Dump sig
   for sig_name in sig_names:
     root_path = ntup_dir + "/" + camp + "/{}.root".format(sig_name)
     dump_flat_ntuple_individual(root_path, ntuple_name, feature_list,
       arrays_dir + "/" + camp, "{}".format(sig_name),
-      use_lower_var_name=False)
+      use_lower_var_name=False, dtype=np.float32)
   # Dump data
   # root_path = ntup_dir + "/" + camp + "/data.root"
   # dump_flat_ntuple_individual(root_path, ntuple_name, feature_list,
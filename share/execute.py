@@ -1,3 +1,4 @@
+import multiprocessing
 import os
 import sys
 
@@ -7,19 +8,45 @@ from lfv_pdnn.train import job_executor
 os.environ["TF_CPP_MIN_LOG_LEVEL"] = "1"
 
 
+def _run_job(ini_path, gpu_id=None):
+    """Executes jobs of one ini file."""
+    if gpu_id is not None:
+        # set before any model is built, so tensorflow only sees one GPU
+        os.environ["CUDA_VISIBLE_DEVICES"] = gpu_id
+    print("#" * 80)
+    print("Executing: ", ini_path)
+    ex_test = job_executor.job_executor(ini_path)
+    ex_test.get_config()
+    ex_test.execute_jobs()
+
+
 def execute():
     argv_len = len(sys.argv)
     if argv_len <= 1:
         print("No ini file path specified!")
         print("Usage: execute_pdnn_jobs path/to/ini-file")
-    elif argv_len >= 2:
-        for i in range(1, argv_len):
-            print("#" * 80)
-            print("Executing: ", sys.argv[i])
-            ex_test = job_executor.job_executor(sys.argv[i])
-            ex_test.get_config()
-            ex_test.execute_jobs()
+    elif argv_len == 2:
+        _run_job(sys.argv[1])
         print("#" * 80)
         print("Done!")
         print("#" * 80)
-execute()
\ No newline at end of file
+    else:
+        ini_paths = sys.argv[1:]
+        # visible GPUs are assigned to jobs in turn
+        visible_gpus = os.environ.get("CUDA_VISIBLE_DEVICES", "")
+        gpu_ids = [gpu for gpu in visible_gpus.split(",") if gpu.strip() != ""]
+        if len(gpu_ids) > 0:
+            job_gpu_ids = [gpu_ids[i % len(gpu_ids)] for i in range(len(ini_paths))]
+        else:
+            job_gpu_ids = [None] * len(ini_paths)
+        # spawn new processes instead of forking initialized tensorflow/ROOT
+        num_workers = min(len(ini_paths), os.cpu_count() or 1)
+        with multiprocessing.get_context("spawn").Pool(num_workers) as pool:
+            pool.starmap(_run_job, zip(ini_paths, job_gpu_ids), chunksize=1)
+        print("#" * 80)
+        print("Done!")
+        print("#" * 80)
+
+
+if __name__ == "__main__":
+    execute()